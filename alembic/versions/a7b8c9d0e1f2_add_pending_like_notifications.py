@@ -0,0 +1,45 @@
+"""add pending_like_notifications table
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7b8c9d0e1f2"
+down_revision: Union[str, None] = "f6a7b8c9d0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create pending_like_notifications for coalesced like notifications."""
+    op.create_table(
+        "pending_like_notifications",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("first_at", sa.DateTime(), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+        sa.PrimaryKeyConstraint("user_id")
+    )
+    op.create_index(
+        op.f("ix_pending_like_notifications_due_at"),
+        "pending_like_notifications",
+        ["due_at"],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Drop pending_like_notifications."""
+    op.drop_index(
+        op.f("ix_pending_like_notifications_due_at"),
+        table_name="pending_like_notifications"
+    )
+    op.drop_table("pending_like_notifications")
@@ -0,0 +1,52 @@
+"""add partial (from_user_id, to_user_id) index for mutual like checks
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8c9d0e1f2a3"
+down_revision: Union[str, None] = "a7b8c9d0e1f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_likes_mutual (from_user_id, to_user_id) WHERE is_like CONCURRENTLY."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        # Прерванная сборка CONCURRENTLY оставляет индекс INVALID: с
+        # if_not_exists повтор миграции пропустил бы его, поэтому
+        # строим заново
+        op.drop_index(
+            "ix_likes_mutual",
+            table_name="likes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "ix_likes_mutual",
+            "likes",
+            ["from_user_id", "to_user_id"],
+            unique=False,
+            postgresql_where=sa.text("is_like"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop ix_likes_mutual CONCURRENTLY."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_likes_mutual",
+            table_name="likes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
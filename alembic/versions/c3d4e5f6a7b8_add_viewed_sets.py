@@ -0,0 +1,35 @@
+"""add compact viewed_sets table
+
+Revision ID: c3d4e5f6a7b8
+Revises: b7c8d9e0f1a2
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d4e5f6a7b8"
+down_revision: Union[str, None] = "b7c8d9e0f1a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create viewed_sets table for the compact seen-set backend."""
+    op.create_table(
+        "viewed_sets",
+        sa.Column("viewer_id", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["viewer_id"], ["users.id"], ),
+        sa.PrimaryKeyConstraint("viewer_id")
+    )
+
+
+def downgrade() -> None:
+    """Drop viewed_sets table."""
+    op.drop_table("viewed_sets")
@@ -0,0 +1,63 @@
+"""move historical dislikes from likes into archived_dislikes
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9d0e1f2a3b4"
+down_revision: Union[str, None] = "b8c9d0e1f2a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create archived_dislikes and move is_like = false rows into it.
+
+    DELETE не возвращает место на диске: чтобы likes и его индексы
+    действительно уменьшились, после миграции нужен VACUUM FULL likes
+    (или pg_repack) в окно обслуживания.
+    """
+    op.create_table(
+        "archived_dislikes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("from_user_id", sa.Integer(), nullable=False),
+        sa.Column("to_user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.execute("""
+        WITH moved AS (
+            DELETE FROM likes
+            WHERE NOT is_like
+            RETURNING id, from_user_id, to_user_id, created_at
+        )
+        INSERT INTO archived_dislikes (id, from_user_id, to_user_id, created_at)
+        SELECT id, from_user_id, to_user_id, created_at FROM moved
+    """)
+    op.create_index(
+        op.f("ix_archived_dislikes_to_user_id"),
+        "archived_dislikes",
+        ["to_user_id"],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    """Move archived dislikes back into likes and drop archived_dislikes."""
+    op.execute("""
+        INSERT INTO likes (id, from_user_id, to_user_id, is_like, created_at)
+        SELECT id, from_user_id, to_user_id, false, created_at
+        FROM archived_dislikes
+        WHERE from_user_id IN (SELECT id FROM users)
+          AND to_user_id IN (SELECT id FROM users)
+    """)
+    op.drop_index(op.f("ix_archived_dislikes_to_user_id"), table_name="archived_dislikes")
+    op.drop_table("archived_dislikes")
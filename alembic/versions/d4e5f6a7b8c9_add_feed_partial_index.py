@@ -0,0 +1,54 @@
+"""add partial composite index for the feed query
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4e5f6a7b8c9"
+down_revision: Union[str, None] = "c3d4e5f6a7b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ix_users_feed (university_id, gender, last_active DESC) CONCURRENTLY."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        # Прерванная сборка CONCURRENTLY оставляет индекс INVALID: с
+        # if_not_exists повтор миграции пропустил бы его, поэтому
+        # строим заново
+        op.drop_index(
+            "ix_users_feed",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "ix_users_feed",
+            "users",
+            ["university_id", "gender", sa.text("last_active DESC")],
+            unique=False,
+            postgresql_where=sa.text(
+                "is_active AND NOT is_banned AND is_registered AND show_in_search"
+            ),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop ix_users_feed CONCURRENTLY."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_feed",
+            table_name="users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
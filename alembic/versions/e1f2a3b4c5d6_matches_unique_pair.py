@@ -0,0 +1,60 @@
+"""deduplicate matches and add unique (user1_id, user2_id) index
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f2a3b4c5d6"
+down_revision: Union[str, None] = "d0e1f2a3b4c5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Keep one match per pair and create uq_matches_pair CONCURRENTLY."""
+    # Из повторных мэтчей пары оставляем активный, среди них — самый новый
+    op.execute("""
+        DELETE FROM matches AS m
+        USING matches AS k
+        WHERE k.user1_id = m.user1_id
+          AND k.user2_id = m.user2_id
+          AND (k.is_active, k.created_at, k.id) > (m.is_active, m.created_at, m.id)
+    """)
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        # Прерванная сборка CONCURRENTLY оставляет индекс INVALID: с
+        # if_not_exists повтор миграции пропустил бы его, поэтому
+        # строим заново. Дубль, вставленный между DELETE и сборкой, уронит
+        # миграцию; повторный запуск снова удалит дубли и пересоберёт индекс
+        op.drop_index(
+            "uq_matches_pair",
+            table_name="matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.create_index(
+            "uq_matches_pair",
+            "matches",
+            ["user1_id", "user2_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop uq_matches_pair CONCURRENTLY (removed duplicates are not restored)."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "uq_matches_pair",
+            table_name="matches",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
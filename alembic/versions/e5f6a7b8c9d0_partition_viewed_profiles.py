@@ -0,0 +1,117 @@
+"""partition viewed_profiles by created_at month
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-17
+"""
+
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f6a7b8c9d0"
+down_revision: Union[str, None] = "d4e5f6a7b8c9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько будущих месяцев создать сразу; дальше их создаёт
+# python maintenance.py viewed-partitions (и бот при запуске)
+MONTHS_AHEAD = 3
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Recreate viewed_profiles as a table range-partitioned by created_at month."""
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM viewed_profiles")).scalar()
+    current = datetime.utcnow().date().replace(day=1)
+    first = oldest.date().replace(day=1) if oldest else current
+
+    op.execute("ALTER TABLE viewed_profiles RENAME TO viewed_profiles_old")
+    op.execute("ALTER TABLE viewed_profiles_old DROP CONSTRAINT unique_view")
+    op.execute("ALTER TABLE viewed_profiles_old DROP CONSTRAINT viewed_profiles_pkey")
+    op.drop_index("ix_viewed_profiles_viewer_id", table_name="viewed_profiles_old")
+    op.drop_index("ix_viewed_profiles_viewed_id", table_name="viewed_profiles_old")
+
+    # Ключ партиционирования обязан входить в первичный ключ, поэтому
+    # глобальная уникальность (viewer_id, viewed_id) больше не проверяется
+    op.execute("""
+        CREATE TABLE viewed_profiles (
+            id INTEGER NOT NULL DEFAULT nextval('viewed_profiles_id_seq'),
+            viewer_id INTEGER NOT NULL REFERENCES users (id),
+            viewed_id INTEGER NOT NULL REFERENCES users (id),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE viewed_profiles_id_seq OWNED BY viewed_profiles.id")
+
+    month = first
+    while month <= _add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE viewed_profiles_p{month:%Y%m} PARTITION OF viewed_profiles "
+            f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(
+        "INSERT INTO viewed_profiles (id, viewer_id, viewed_id, created_at) "
+        "SELECT id, viewer_id, viewed_id, created_at FROM viewed_profiles_old"
+    )
+    op.drop_table("viewed_profiles_old")
+
+    op.create_index(
+        "ix_viewed_profiles_viewer_viewed",
+        "viewed_profiles",
+        ["viewer_id", "viewed_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_viewed_profiles_viewed_id",
+        "viewed_profiles",
+        ["viewed_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Collapse partitions back into a plain viewed_profiles table."""
+    op.execute("ALTER TABLE viewed_profiles RENAME TO viewed_profiles_partitioned")
+    op.execute(
+        "ALTER TABLE viewed_profiles_partitioned "
+        "RENAME CONSTRAINT viewed_profiles_pkey TO viewed_profiles_partitioned_pkey"
+    )
+    op.execute("ALTER SEQUENCE viewed_profiles_id_seq OWNED BY NONE")
+
+    op.execute("""
+        CREATE TABLE viewed_profiles (
+            id INTEGER NOT NULL DEFAULT nextval('viewed_profiles_id_seq'),
+            viewer_id INTEGER NOT NULL REFERENCES users (id),
+            viewed_id INTEGER NOT NULL REFERENCES users (id),
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT viewed_profiles_pkey PRIMARY KEY (id),
+            CONSTRAINT unique_view UNIQUE (viewer_id, viewed_id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE viewed_profiles_id_seq OWNED BY viewed_profiles.id")
+
+    # После «показать снова» одна пара может встречаться несколько раз —
+    # оставляем самый свежий просмотр
+    op.execute(
+        "INSERT INTO viewed_profiles (id, viewer_id, viewed_id, created_at) "
+        "SELECT DISTINCT ON (viewer_id, viewed_id) id, viewer_id, viewed_id, created_at "
+        "FROM viewed_profiles_partitioned "
+        "ORDER BY viewer_id, viewed_id, created_at DESC"
+    )
+    op.execute("DROP TABLE viewed_profiles_partitioned CASCADE")
+
+    op.create_index("ix_viewed_profiles_viewer_id", "viewed_profiles", ["viewer_id"], unique=False)
+    op.create_index("ix_viewed_profiles_viewed_id", "viewed_profiles", ["viewed_id"], unique=False)
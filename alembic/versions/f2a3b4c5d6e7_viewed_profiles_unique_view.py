@@ -0,0 +1,51 @@
+"""deduplicate viewed_profiles and add unique (viewer_id, viewed_id, created_at) index
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a3b4c5d6e7"
+down_revision: Union[str, None] = "e1f2a3b4c5d6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Drop duplicate views and replace the (viewer_id, viewed_id) index with a unique one."""
+    # Уникальный индекс партиционированной таблицы обязан включать ключ
+    # партиционирования, поэтому уникальна тройка с created_at
+    op.execute("""
+        DELETE FROM viewed_profiles AS v
+        USING viewed_profiles AS k
+        WHERE k.viewer_id = v.viewer_id
+          AND k.viewed_id = v.viewed_id
+          AND k.created_at = v.created_at
+          AND k.id > v.id
+    """)
+    # CONCURRENTLY для партиционированных таблиц PostgreSQL не поддерживает
+    op.create_index(
+        "uq_viewed_profiles_view",
+        "viewed_profiles",
+        ["viewer_id", "viewed_id", "created_at"],
+        unique=True,
+    )
+    # Новый индекс начинается с тех же столбцов и заменяет старый
+    op.drop_index("ix_viewed_profiles_viewer_viewed", table_name="viewed_profiles")
+
+
+def downgrade() -> None:
+    """Restore the plain (viewer_id, viewed_id) index."""
+    op.create_index(
+        "ix_viewed_profiles_viewer_viewed",
+        "viewed_profiles",
+        ["viewer_id", "viewed_id"],
+        unique=False,
+    )
+    op.drop_index("uq_viewed_profiles_view", table_name="viewed_profiles")
@@ -0,0 +1,42 @@
+"""add denormalised users.incoming_likes_count
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-17
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f6a7b8c9d0e1"
+down_revision: Union[str, None] = "e5f6a7b8c9d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add incoming_likes_count and fill it from the likes table."""
+    op.add_column(
+        "users",
+        sa.Column("incoming_likes_count", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.execute("""
+        UPDATE users
+        SET incoming_likes_count = counts.n
+        FROM (
+            SELECT to_user_id, count(*) AS n
+            FROM likes
+            WHERE is_like
+            GROUP BY to_user_id
+        ) AS counts
+        WHERE users.id = counts.to_user_id
+    """)
+
+
+def downgrade() -> None:
+    """Drop incoming_likes_count."""
+    op.drop_column("users", "incoming_likes_count")
@@ -2,8 +2,8 @@
 from datetime import datetime
 from typing import Optional, List
 from sqlalchemy import (
-    BigInteger, Boolean, ForeignKey, Integer, String, Text, 
-    UniqueConstraint, func
+    BigInteger, Boolean, ForeignKey, Index, Integer, LargeBinary, String, Text, 
+    func, text
 )
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -62,6 +62,11 @@ class User(Base):
     is_fake: Mapped[bool] = mapped_column(default=False)
     is_super_favorite: Mapped[bool] = mapped_column(default=False)
     
+    # Число входящих лайков (строк likes с is_like), поддерживается
+    # LikeRepository и SwipeService при записи; сверка —
+    # python maintenance.py likes-counters
+    incoming_likes_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    
     # Временные метки
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -89,6 +94,20 @@ class User(Base):
         "Report",
         foreign_keys="Report.to_user_id"
     )
+    
+    __table_args__ = (
+        # Частичный индекс под запрос ленты: WHERE university_id = ... AND gender IN (...)
+        # ORDER BY last_active DESC среди видимых анкет
+        Index(
+            "ix_users_feed",
+            "university_id",
+            "gender",
+            text("last_active DESC"),
+            postgresql_where=text(
+                "is_active AND NOT is_banned AND is_registered AND show_in_search"
+            ),
+        ),
+    )
 
 
 class Like(Base):
@@ -114,6 +133,39 @@ class Like(Base):
         foreign_keys=[to_user_id],
         back_populates="received_likes"
     )
+    
+    __table_args__ = (
+        # Проверка встречного лайка: WHERE from_user_id = ... AND to_user_id = ... AND is_like
+        Index(
+            "ix_likes_mutual",
+            "from_user_id",
+            "to_user_id",
+            postgresql_where=text("is_like"),
+        ),
+        # Страницы входящих лайков: WHERE to_user_id = ... AND is_like
+        # ORDER BY created_at DESC, id DESC с курсором (created_at, id)
+        Index(
+            "ix_likes_incoming",
+            "to_user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_like"),
+        ),
+    )
+
+
+class ArchivedDislike(Base):
+    """Дизлайк, перенесённый из likes.
+    
+    Дизлайки никто не читает, кроме статистики, поэтому они не занимают
+    место в likes и его индексах. Внешних ключей нет — это архив.
+    """
+    __tablename__ = "archived_dislikes"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    from_user_id: Mapped[int] = mapped_column(Integer)
+    to_user_id: Mapped[int] = mapped_column(Integer, index=True)
+    created_at: Mapped[datetime] = mapped_column()
 
 
 class Match(Base):
@@ -129,6 +181,12 @@ class Match(Base):
     
     user1: Mapped["User"] = relationship("User", foreign_keys=[user1_id])
     user2: Mapped["User"] = relationship("User", foreign_keys=[user2_id])
+    
+    __table_args__ = (
+        # Одна строка на пару (user1_id < user2_id): повторный мэтч
+        # обновляет её через INSERT ... ON CONFLICT
+        Index("uq_matches_pair", "user1_id", "user2_id", unique=True),
+    )
 
 
 class Report(Base):
@@ -154,15 +212,52 @@ class Report(Base):
 
 
 class ViewedProfile(Base):
-    """Модель просмотренной анкеты."""
+    """Модель просмотренной анкеты.
+    
+    Таблица партиционирована по месяцам created_at (см. database/partitions.py),
+    поэтому created_at входит в первичный ключ, а пара (viewer_id, viewed_id)
+    не уникальна: после «показать снова» анкету можно просмотреть повторно.
+    Уникальна тройка (viewer_id, viewed_id, created_at): повтор той же
+    записи (например, после сбоя пачки) пропускается ON CONFLICT DO NOTHING.
+    """
     __tablename__ = "viewed_profiles"
     
-    id: Mapped[int] = mapped_column(primary_key=True)
-    viewer_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    viewer_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     viewed_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
-    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, default=datetime.utcnow)
     
     __table_args__ = (
-        UniqueConstraint('viewer_id', 'viewed_id', name='unique_view'),
+        Index("uq_viewed_profiles_view", "viewer_id", "viewed_id", "created_at", unique=True),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class ViewedSet(Base):
+    """Компактное множество просмотренных анкет одного зрителя.
+    
+    Альтернатива строкам viewed_profiles: все ID просмотренных анкет
+    хранятся одной записью в виде отсортированного delta-varint массива.
+    """
+    __tablename__ = "viewed_sets"
+    
+    viewer_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
     )
 
+
+class PendingLikeNotification(Base):
+    """Отложенное уведомление о новых лайках.
+    
+    Пока запись есть, новые лайки получателю не шлют отдельных сообщений:
+    одно сообщение с актуальным числом уходит в due_at.
+    """
+    __tablename__ = "pending_like_notifications"
+    
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    # Первый лайк в пачке — от него отсчитывается максимальная задержка
+    first_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    due_at: Mapped[datetime] = mapped_column(index=True)
@@ -0,0 +1,34 @@
+"""Действия, которые выполняются только после успешного commit."""
+import logging
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_KEY = "after_commit"
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Выполнить callback после commit текущей транзакции сессии.
+
+    Нужен для кэшей в памяти (индекс ленты, список банов, кэш мэтчей):
+    при rollback изменения в БД пропадают, и callback тоже отбрасывается.
+    """
+    session.info.setdefault(_KEY, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_callbacks(session: Session) -> None:
+    for callback in session.info.pop(_KEY, ()):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Ошибка обработчика после commit: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_callbacks(session: Session) -> None:
+    session.info.pop(_KEY, None)
@@ -0,0 +1,100 @@
+"""Помесячные партиции viewed_profiles."""
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+TABLE = "viewed_profiles"
+# viewed_profiles_p202610 — партиция за октябрь 2026
+_PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: date) -> date:
+    """Первое число месяца."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    """Сдвинуть первое число месяца на months месяцев."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Имя партиции за месяц."""
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    """Партиционирована ли viewed_profiles (миграция e5f6a7b8c9d0 применена)."""
+    result = await session.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "JOIN pg_class ON pg_class.oid = pg_partitioned_table.partrelid "
+        "WHERE pg_class.relname = :table)"
+    ), {"table": TABLE})
+    return bool(result.scalar())
+
+
+async def list_partitions(session: AsyncSession) -> List[Tuple[str, date]]:
+    """Присоединённые партиции и первые числа их месяцев, по возрастанию."""
+    result = await session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {"table": TABLE})
+
+    partitions = []
+    for name in result.scalars():
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+async def ensure_partitions(session: AsyncSession, ahead: int) -> List[str]:
+    """Создать партиции на текущий и ahead следующих месяцев.
+
+    Возвращает имена созданных партиций.
+    """
+    existing = {name for name, _ in await list_partitions(session)}
+    current = month_start(datetime.utcnow().date())
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+        created.append(name)
+    return created
+
+
+async def expire_partitions(
+    session: AsyncSession,
+    retention_days: int,
+    drop: bool = False
+) -> List[str]:
+    """Отсоединить (или удалить) партиции старше retention_days.
+
+    Партиция уходит, только если целиком старше порога. Отсоединённые
+    таблицы остаются в базе для архивации. Возвращает их имена.
+    retention_days <= 0 — хранить всё.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).date()
+    expired = []
+    for name, month in await list_partitions(session):
+        if add_months(month, 1) > cutoff:
+            break
+        await session.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name}"))
+        if drop:
+            await session.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    return expired
@@ -1,8 +1,9 @@
 """Репозиторий для работы с лайками."""
-from typing import Optional, List
-from sqlalchemy import select, and_
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import CTE, Update, select, and_, delete, exists, func, or_, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 
 from app.database.models import Like, User
 
@@ -35,6 +36,15 @@ class LikeRepository:
         session.add(like)
         await session.flush()
         await session.refresh(like)
+        if is_like:
+            await session.execute(
+                update(User)
+                .where(User.id == to_user_id)
+                .values(
+                    incoming_likes_count=User.incoming_likes_count + 1,
+                    updated_at=User.updated_at
+                )
+            )
         return like
     
     @staticmethod
@@ -43,67 +53,141 @@ class LikeRepository:
         user1_id: int,
         user2_id: int
     ) -> bool:
-        """Проверить, есть ли взаимный лайк."""
-        stmt = select(Like).where(
-            and_(
+        """Проверить, есть ли взаимный лайк.
+        
+        Между пользователями может быть несколько лайков, поэтому нужен
+        только факт существования: EXISTS по частичному индексу ix_likes_mutual.
+        """
+        stmt = select(
+            exists().where(
                 Like.from_user_id == user2_id,
                 Like.to_user_id == user1_id,
                 Like.is_like == True
             )
         )
-        result = await session.execute(stmt)
-        # Теперь между пользователями может быть несколько лайков,
-        # поэтому просто проверяем, что нашлась ХОТЯ БЫ одна строка,
-        # не используя scalar_one_or_none (оно кидает MultipleResultsFound).
-        return result.first() is not None
+        return await session.scalar(stmt)
 
     @staticmethod
     async def delete_between_users(
         session: AsyncSession,
         user1_id: int,
         user2_id: int
-    ) -> None:
-        """Удалить все лайки между двумя пользователями (в обе стороны)."""
-        from sqlalchemy import or_
-
-        stmt = select(Like).where(
+    ) -> int:
+        """Удалить все лайки между двумя пользователями (в обе стороны).
+        
+        Один DELETE независимо от числа лайков. Возвращает число удалённых строк.
+        """
+        from app.services.swipe_buffer import swipe_buffer
+        # Отложенные дизлайки пары удаляются вместе с записанными и не
+        # должны записаться после DELETE
+        await swipe_buffer.discard_between(user1_id, user2_id, views=False)
+        
+        deleted = delete(Like).where(
             or_(
                 and_(Like.from_user_id == user1_id, Like.to_user_id == user2_id),
                 and_(Like.from_user_id == user2_id, Like.to_user_id == user1_id),
             )
+        ).returning(Like.to_user_id, Like.is_like).cte("deleted")
+        # Удаление и пересчёт счётчиков — одним запросом
+        stmt = select(func.count()).select_from(deleted).add_cte(
+            LikeRepository.uncount_deleted(deleted).cte("uncounted")
         )
-        result = await session.execute(stmt)
-        likes = list(result.scalars().all())
-        for like in likes:
-            await session.delete(like)
+        removed = await session.scalar(stmt)
         await session.flush()
+        return removed
+    
+    @staticmethod
+    def uncount_deleted(deleted: CTE) -> Update:
+        """UPDATE, вычитающий удалённые лайки из incoming_likes_count.
+        
+        deleted — CTE от DELETE ... RETURNING to_user_id, is_like.
+        """
+        per_user = (
+            select(deleted.c.to_user_id, func.count().label("n"))
+            .where(deleted.c.is_like)
+            .group_by(deleted.c.to_user_id)
+            .subquery()
+        )
+        return (
+            update(User)
+            .where(User.id == per_user.c.to_user_id)
+            .values(
+                incoming_likes_count=User.incoming_likes_count - per_user.c.n,
+                # Счётчик — не правка анкеты, onupdate для updated_at не нужен
+                updated_at=User.updated_at
+            )
+        )
     
     @staticmethod
-    async def get_incoming_likes(
+    async def count_incoming_likes(
         session: AsyncSession,
         user_id: int
+    ) -> int:
+        """Число входящих лайков пользователя (повторные тоже считаются).
+        
+        Читается из денормализованного users.incoming_likes_count.
+        """
+        stmt = select(User.incoming_likes_count).where(User.id == user_id)
+        return await session.scalar(stmt) or 0
+    
+    @staticmethod
+    async def reconcile_incoming_counts(session: AsyncSession) -> int:
+        """Пересчитать incoming_likes_count по таблице likes.
+        
+        Возвращает число пользователей, у которых счётчик разошёлся.
+        """
+        result = await session.execute(text("""
+            UPDATE users
+            SET incoming_likes_count = fixed.n
+            FROM (
+                SELECT users.id, coalesce(counts.n, 0) AS n
+                FROM users
+                LEFT JOIN (
+                    SELECT to_user_id, count(*) AS n
+                    FROM likes
+                    WHERE is_like
+                    GROUP BY to_user_id
+                ) AS counts ON counts.to_user_id = users.id
+            ) AS fixed
+            WHERE users.id = fixed.id
+              AND users.incoming_likes_count <> fixed.n
+        """))
+        await session.flush()
+        return result.rowcount
+    
+    @staticmethod
+    async def get_incoming_page(
+        session: AsyncSession,
+        user_id: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 1
     ) -> List[Like]:
-        """Получить ВСЕ входящие лайки пользователя.
+        """Получить страницу входящих лайков, последние сверху.
         
-        Не фильтруем по существующим мэтчам и не исключаем повторные лайки:
-        если кто-то лайкает пользователя несколько раз, все такие лайки
-        попадают в список (последние будут сверху).
+        Keyset-пагинация по (created_at, id): after — ключ последнего
+        показанного лайка, страница начинается сразу после него; id делает
+        порядок однозначным при равном created_at. Отправители вместе с
+        вузами загружаются тем же запросом и только для строк страницы.
+        Мэтчи не отфильтровываются, повторные лайки одного пользователя идут
+        отдельными строками. Единственный способ читать входящие лайки;
+        для их числа — count_incoming_likes.
         """
-        # Получаем все входящие лайки
         stmt = (
             select(Like)
-            .options(selectinload(Like.from_user))
             .where(
                 and_(
                     Like.to_user_id == user_id,
                     Like.is_like == True
                 )
             )
-            .order_by(Like.created_at.desc())
+            .options(joinedload(Like.from_user).joinedload(User.university))
+            .order_by(Like.created_at.desc(), Like.id.desc())
+            .limit(limit)
         )
+        if after is not None:
+            stmt = stmt.where(tuple_(Like.created_at, Like.id) < tuple_(*after))
         result = await session.execute(stmt)
-        incoming_likes = list(result.scalars().all())
-        return incoming_likes
+        return list(result.scalars().all())
     
     @staticmethod
     async def get_by_ids(
@@ -1,10 +1,14 @@
 """Репозиторий для работы с мэтчами."""
-from typing import Optional, List
-from sqlalchemy import select, or_
+from datetime import datetime
+from typing import Optional, List, Tuple
+from sqlalchemy import select, case, exists, func, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, joinedload
 
 from app.database.models import Match, User
+from app.database.on_commit import after_commit
+from app.services.match_cache import match_cache
 
 
 class MatchRepository:
@@ -16,44 +20,103 @@ class MatchRepository:
         user1_id: int,
         user2_id: int
     ) -> Match:
-        """Создать мэтч (упорядочивает ID для избежания дубликатов)."""
+        """Создать мэтч (упорядочивает ID, одна строка на пару).
+        
+        Идемпотентно: INSERT ... ON CONFLICT по uq_matches_pair. Если пара
+        уже мэтчилась, строка снова становится активной и получает новое
+        created_at — мэтч поднимается наверх списка, как новый.
+        """
         first_id, second_id = sorted([user1_id, user2_id])
         
-        match = Match(user1_id=first_id, user2_id=second_id)
-        session.add(match)
-        await session.flush()
-        await session.refresh(match)
+        stmt = insert(Match).values(
+            user1_id=first_id,
+            user2_id=second_id,
+            is_active=True,
+            created_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Match.user1_id, Match.user2_id],
+            set_={
+                "is_active": True,
+                "created_at": stmt.excluded.created_at
+            }
+        )
+        match = await session.scalar(
+            stmt.returning(Match),
+            execution_options={"populate_existing": True}
+        )
+        after_commit(session, lambda: match_cache.remember(first_id, second_id))
         return match
     
     @staticmethod
-    async def get_user_matches(
+    async def count_user_matches(
         session: AsyncSession,
         user_id: int
-    ) -> List[Match]:
-        """Получить все мэтчи пользователя."""
-        from sqlalchemy import and_
+    ) -> int:
+        """Число активных мэтчей пользователя.
+        
+        Мэтч с самим собой не считается — как и в get_partners_page.
+        """
+        stmt = select(func.count(Match.id)).where(
+            or_(
+                Match.user1_id == user_id,
+                Match.user2_id == user_id
+            ),
+            Match.is_active == True,
+            Match.user1_id != Match.user2_id
+        )
+        return await session.scalar(stmt) or 0
+    
+    @staticmethod
+    async def get_partners_page(
+        session: AsyncSession,
+        user_id: int,
+        cursor: Optional[Tuple[datetime, int]] = None,
+        limit: int = 1,
+        backward: bool = False
+    ) -> List[Tuple[Match, User]]:
+        """Получить страницу мэтчей вместе с партнёрами, новые сверху.
+        
+        Keyset-пагинация по (created_at, id) мэтча: cursor — ключ текущего
+        мэтча, страница идёт после него (или перед ним при backward, в том
+        же порядке показа). Партнёр и его вуз приходят тем же запросом.
+        """
+        partner = aliased(User)
         stmt = (
-            select(Match)
-            .where(
-                and_(
-                    or_(
-                        Match.user1_id == user_id,
-                        Match.user2_id == user_id
-                    ),
-                    Match.is_active == True
+            select(Match, partner)
+            .join(
+                partner,
+                partner.id == case(
+                    (Match.user1_id == user_id, Match.user2_id),
+                    else_=Match.user1_id
                 )
             )
-            .options(
-                selectinload(Match.user1),
-                selectinload(Match.user2)
+            .where(
+                or_(
+                    Match.user1_id == user_id,
+                    Match.user2_id == user_id
+                ),
+                Match.is_active == True,
+                # Мэтч с самим собой не показываем
+                partner.id != user_id
             )
-            .order_by(Match.created_at.desc())
+            .options(joinedload(partner.university))
+            .limit(limit)
         )
+        key = tuple_(Match.created_at, Match.id)
+        if backward:
+            if cursor is not None:
+                stmt = stmt.where(key > tuple_(*cursor))
+            stmt = stmt.order_by(Match.created_at.asc(), Match.id.asc())
+        else:
+            if cursor is not None:
+                stmt = stmt.where(key < tuple_(*cursor))
+            stmt = stmt.order_by(Match.created_at.desc(), Match.id.desc())
         result = await session.execute(stmt)
-        matches = list(result.scalars().all())
-        
-        # Возвращаем пользователя-партнера для каждого мэтча
-        return matches
+        rows = [tuple(row) for row in result.all()]
+        if backward:
+            rows.reverse()
+        return rows
     
     @staticmethod
     async def get_match_partner(
@@ -71,13 +134,23 @@ class MatchRepository:
         user1_id: int,
         user2_id: int
     ) -> bool:
-        """Проверить, существует ли мэтч."""
+        """Проверить, существует ли активный мэтч.
+        
+        Известные мэтчи берутся из match_cache, остальное — из БД.
+        """
+        if match_cache.get(user1_id, user2_id):
+            return True
+        
         first_id, second_id = sorted([user1_id, user2_id])
-        stmt = select(Match).where(
-            Match.user1_id == first_id,
-            Match.user2_id == second_id,
-            Match.is_active == True
+        stmt = select(
+            exists().where(
+                Match.user1_id == first_id,
+                Match.user2_id == second_id,
+                Match.is_active == True
+            )
         )
-        result = await session.execute(stmt)
-        return result.scalar_one_or_none() is not None
-
+        found = bool(await session.scalar(stmt))
+        if found:
+            # Строку мог вставить и ещё не закоммитить этот же запрос
+            after_commit(session, lambda: match_cache.remember(first_id, second_id))
+        return found
@@ -5,7 +5,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from datetime import datetime
 
+from app.config import Config
 from app.database.models import User, University
+from app.database.on_commit import after_commit
+from app.services.activity_tracker import last_active_tracker
+from app.services.ban_list import ban_list
+from app.services.feed_index import feed_index
+from app.services.user_loader import UserLoader
 
 
 class UserRepository:
@@ -16,7 +22,13 @@ class UserRepository:
         session: AsyncSession,
         telegram_id: int
     ) -> Optional[User]:
-        """Получить пользователя по Telegram ID."""
+        """Получить пользователя по Telegram ID.
+        
+        Автор текущего апдейта берётся из UserLoader без нового запроса.
+        """
+        loader = UserLoader.of(session)
+        if loader is not None and loader.telegram_id == telegram_id:
+            return await loader.get()
         stmt = select(User).where(User.telegram_id == telegram_id)
         result = await session.execute(stmt)
         return result.scalar_one_or_none()
@@ -28,6 +40,7 @@ class UserRepository:
         session.add(user)
         await session.flush()
         await session.refresh(user)
+        after_commit(session, lambda: feed_index.sync_user(user))
         return user
     
     @staticmethod
@@ -45,21 +58,44 @@ class UserRepository:
         )
         result = await session.execute(stmt)
         await session.flush()
-        return result.scalar_one_or_none()
+        user = result.scalar_one_or_none()
+        if user is not None and "university_id" in update_data:
+            # RETURNING обновляет столбцы, но не загруженную связь: без этого
+            # UserLoader и get_with_university отдали бы прежний вуз
+            await session.refresh(user, ["university"])
+        # Регистрация, заморозка, бан и скрытие анкеты проходят через update,
+        # поэтому индекс ленты и список банов синхронизируются здесь — после
+        # commit, чтобы откат не оставил в памяти несохранённое состояние
+        def sync() -> None:
+            feed_index.sync_user(user)
+            ban_list.sync_user(user)
+        after_commit(session, sync)
+        return user
     
     @staticmethod
     async def update_last_active(
         session: AsyncSession,
         user_id: int
     ) -> None:
-        """Обновить время последней активности."""
+        """Обновить время последней активности.
+        
+        При LAST_ACTIVE_FLUSH_SECONDS > 0 время только запоминается, а в БД
+        уходит пачкой (см. last_active_tracker); индекс ленты обновляется сразу,
+        потому что транзакции здесь нет. Иначе — после commit.
+        """
+        now = datetime.utcnow()
+        if Config.LAST_ACTIVE_FLUSH_SECONDS > 0:
+            last_active_tracker.touch(user_id, now)
+            feed_index.touch(user_id, now)
+            return
         stmt = (
             update(User)
             .where(User.id == user_id)
-            .values(last_active=datetime.utcnow())
+            .values(last_active=now)
         )
         await session.execute(stmt)
         await session.flush()
+        after_commit(session, lambda: feed_index.touch(user_id, now))
     
     @staticmethod
     async def get_by_id(
@@ -67,6 +103,9 @@ class UserRepository:
         user_id: int
     ) -> Optional[User]:
         """Получить пользователя по ID."""
+        loader = UserLoader.of(session)
+        if loader is not None and loader.cached(user_id) is not None:
+            return loader.cached(user_id)
         stmt = select(User).where(User.id == user_id)
         result = await session.execute(stmt)
         return result.scalar_one_or_none()
@@ -77,6 +116,9 @@ class UserRepository:
         user_id: int
     ) -> Optional[User]:
         """Получить пользователя с загруженным университетом."""
+        loader = UserLoader.of(session)
+        if loader is not None and loader.cached(user_id) is not None:
+            return loader.cached(user_id)
         stmt = (
             select(User)
             .options(selectinload(User.university))
@@ -4,14 +4,16 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import exists, select, func
 from sqlalchemy.orm import selectinload
 
 from app.config import Config
 from app.database.repositories.user_repo import UserRepository
 from app.database.repositories.university_repo import UniversityRepository
 from app.database.repositories.report_repo import ReportRepository
-from app.database.models import User, University, Report, Match, Like, ViewedProfile
+from app.database.models import (
+    ArchivedDislike, User, University, Report, Match, Like, ViewedProfile
+)
 from app.keyboards.inline import (
     admin_menu_kb,
     admin_universities_kb,
@@ -25,6 +27,8 @@ from app.keyboards.inline import (
 from app.utils.text_templates import TEXTS
 from app.utils.helpers import send_profile
 from app.states.states import AdminStates
+from app.middlewares.outbound_middleware import background_sends
+from app.services.university_catalog import university_catalog
 
 router = Router()
 
@@ -116,6 +120,7 @@ async def bulk_add_universities(
             errors.append(f"Строка {i}: ошибка - {line} ({str(e)})")
     
     await session.commit()
+    university_catalog.invalidate()
     
     result_text = f"✅ Добавлено университетов: {added_count}"
     if errors:
@@ -300,6 +305,7 @@ async def delete_university(
     
     await UniversityRepository.delete(session, university_id)
     await session.commit()
+    university_catalog.invalidate()
     
     await callback.message.answer(f"✅ Университет '{university.name}' удален")
 
@@ -334,6 +340,7 @@ async def process_edit_university(
         {"name": name, "short_name": short_name, "city": city}
     )
     await session.commit()
+    university_catalog.invalidate()
     
     await state.set_state(AdminStates.main_menu)
     await message.answer(f"✅ Университет обновлен: {name}")
@@ -401,6 +408,7 @@ async def process_add_university(
     )
     
     await session.commit()
+    university_catalog.invalidate()
     
     await state.set_state(AdminStates.main_menu)
     await message.answer(f"✅ Университет '{name}' добавлен!")
@@ -497,10 +505,11 @@ async def process_manual_ban(
         # Отправляем уведомление забаненному пользователю
         try:
             from app.utils.text_templates import TEXTS
-            await message.bot.send_message(
-                chat_id=user.telegram_id,
-                text=TEXTS.get("banned", "⚠️ Твоя анкета была заблокирована за нарушение правил.")
-            )
+            with background_sends():
+                await message.bot.send_message(
+                    chat_id=user.telegram_id,
+                    text=TEXTS.get("banned", "⚠️ Твоя анкета была заблокирована за нарушение правил.")
+                )
         except:
             pass  # Игнорируем ошибки отправки
     
@@ -549,25 +558,28 @@ async def process_broadcast(
     users = list(result.scalars().all())
     
     sent = 0
-    for user in users:
-        if not user.telegram_id or user.telegram_id <= 0:
-            continue
-        try:
-            if message.photo:
-                await message.bot.send_photo(
-                    chat_id=user.telegram_id,
-                    photo=message.photo[-1].file_id,
-                    caption=message.caption or message.text or ""
-                )
-            else:
-                await message.bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=message.text or ""
-                )
-            sent += 1
-        except Exception:
-            # Проглатываем ошибки отправки отдельным пользователям
-            continue
+    # Рассылка идёт в очереди отправок после ответов пользователям,
+    # 429 повторяются там же
+    with background_sends():
+        for user in users:
+            if not user.telegram_id or user.telegram_id <= 0:
+                continue
+            try:
+                if message.photo:
+                    await message.bot.send_photo(
+                        chat_id=user.telegram_id,
+                        photo=message.photo[-1].file_id,
+                        caption=message.caption or message.text or ""
+                    )
+                else:
+                    await message.bot.send_message(
+                        chat_id=user.telegram_id,
+                        text=message.text or ""
+                    )
+                sent += 1
+            except Exception:
+                # Проглатываем ошибки отправки отдельным пользователям
+                continue
     
     await state.set_state(AdminStates.main_menu)
     await message.answer(f"✅ Рассылка отправлена {sent} пользователям")
@@ -848,12 +860,29 @@ async def handle_fake_item(
             Like.is_like == True
         )
     ) or 0
-    dislikes_count = await session.scalar(
-        select(func.count(Like.id)).where(
-            Like.to_user_id == fake.id,
-            Like.is_like == False
-        )
-    ) or 0
+    if Config.STORE_DISLIKES:
+        dislikes_count = (await session.scalar(
+            select(func.count(Like.id)).where(
+                Like.to_user_id == fake.id,
+                Like.is_like == False
+            )
+        ) or 0) + (await session.scalar(
+            select(func.count(ArchivedDislike.id)).where(
+                ArchivedDislike.to_user_id == fake.id
+            )
+        ) or 0)
+    else:
+        # Дизлайки не хранятся — считаем просмотры, после которых не было лайка
+        dislikes_count = await session.scalar(
+            select(func.count(ViewedProfile.id)).where(
+                ViewedProfile.viewed_id == fake.id,
+                ~exists().where(
+                    Like.from_user_id == ViewedProfile.viewer_id,
+                    Like.to_user_id == fake.id,
+                    Like.is_like == True
+                )
+            )
+        ) or 0
     
     await callback.message.answer(
         f"Статистика по фейку {fake.name}, {fake.age}:",
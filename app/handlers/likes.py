@@ -1,13 +1,17 @@
 """Обработчики входящих лайков."""
+from datetime import datetime
+
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import Config
 from app.database.repositories.user_repo import UserRepository
 from app.database.repositories.like_repo import LikeRepository
 from app.database.repositories.match_repo import MatchRepository
 from app.services.notification_service import NotificationService
+from app.services.swipe_buffer import swipe_buffer
 from app.keyboards.reply import main_menu_kb, yes_no_kb, likes_action_kb
 from app.keyboards.inline import match_write_only_kb
 from app.utils.text_templates import TEXTS
@@ -45,9 +49,9 @@ async def handle_yes_from_like_notification(
     await UserRepository.update_last_active(session, user.id)
     await session.commit()
     
-    # Получаем входящие лайки
-    likes = await LikeRepository.get_incoming_likes(session, user.id)
-    if not likes:
+    # Получаем число входящих лайков
+    likes_count = await LikeRepository.count_incoming_likes(session, user.id)
+    if not likes_count:
         # Если лайков уже нет, показываем стандартное сообщение и меню
         await message.answer(TEXTS["no_likes"])
         from app.utils.menu_helpers import send_main_menu_with_cleanup
@@ -59,9 +63,8 @@ async def handle_yes_from_like_notification(
         )
         return
     
-    # Сохраняем ID пользователей, которые лайкнули
-    liked_user_ids = [like.from_user_id for like in likes]
-    await state.update_data(liked_user_ids=liked_user_ids, current_like_index=0)
+    # Просмотр начинается с самого нового лайка
+    await state.update_data(likes_cursor=None)
     await state.set_state(LikesStates.viewing_likes)
     
     # Сразу показываем первый лайк без дополнительного шага подтверждения
@@ -91,10 +94,10 @@ async def show_incoming_likes(
     await UserRepository.update_last_active(session, user.id)
     await session.commit()
     
-    # Получаем входящие лайки
-    likes = await LikeRepository.get_incoming_likes(session, user.id)
+    # Получаем число входящих лайков
+    likes_count = await LikeRepository.count_incoming_likes(session, user.id)
     
-    if not likes:
+    if not likes_count:
         # Отправляем сообщение об отсутствии лайков
         await message.answer(TEXTS["no_likes"])
         # Отправляем главное меню отдельным сообщением с удалением предыдущих
@@ -107,14 +110,13 @@ async def show_incoming_likes(
         )
         return
     
-    # Сохраняем ID пользователей, которые лайкнули
-    liked_user_ids = [like.from_user_id for like in likes]
-    await state.update_data(liked_user_ids=liked_user_ids, current_like_index=0)
+    # Просмотр начнётся с самого нового лайка
+    await state.update_data(likes_cursor=None)
     await state.set_state(LikesStates.confirming_view)
     
     # Показываем сообщение с подтверждением
     await message.answer(
-        TEXTS["has_likes"].format(count=len(likes)),
+        TEXTS["has_likes"].format(count=likes_count),
         reply_markup=yes_no_kb()
     )
 
@@ -165,10 +167,14 @@ async def show_current_like(
     session: AsyncSession,
     state: FSMContext
 ) -> None:
-    """Показать текущий лайк."""
+    """Показать следующий входящий лайк.
+    
+    В FSM хранится только курсор — ключ (created_at, id) последнего
+    показанного лайка; следующий лайк вместе с анкетой отправителя
+    приходит одним запросом.
+    """
     data = await state.get_data()
-    liked_user_ids = data.get("liked_user_ids", [])
-    current_index = data.get("current_like_index", 0)
+    cursor = data.get("likes_cursor")
     
     # Удаляем предыдущие сообщения
     prev_messages = data.get("prev_like_messages", [])
@@ -178,10 +184,13 @@ async def show_current_like(
         except:
             pass
     
-    if not liked_user_ids or current_index >= len(liked_user_ids):
+    user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
+    after = (datetime.fromisoformat(cursor[0]), cursor[1]) if cursor else None
+    page = await LikeRepository.get_incoming_page(session, user.id, after=after)
+    
+    if not page:
         # Лайки закончились
         await state.clear()
-        user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
         from app.utils.menu_helpers import send_main_menu_with_cleanup
         await send_main_menu_with_cleanup(
             message.bot,
@@ -191,20 +200,14 @@ async def show_current_like(
         )
         return
     
-    # Получаем пользователя, который лайкнул
-    from_user_id = liked_user_ids[current_index]
-    from_user = await UserRepository.get_by_id(session, from_user_id)
-    if not from_user:
-        # Если пользователь не найден, удаляем его из списка и показываем следующего
-        liked_user_ids.remove(from_user_id)
-        await state.update_data(liked_user_ids=liked_user_ids)
-        await show_current_like(message, session, state)
-        return
-    
-    from_user = await UserRepository.get_with_university(session, from_user.id)
+    like = page[0]
+    from_user = like.from_user
     
-    # Сохраняем ID текущего пользователя
-    await state.update_data(current_liked_user_id=from_user.id)
+    # Сохраняем ID текущего пользователя и курсор для следующей страницы
+    await state.update_data(
+        current_liked_user_id=from_user.id,
+        likes_cursor=[like.created_at.isoformat(), like.id]
+    )
     
     # Показываем анкету
     profile_msgs = await send_profile(
@@ -232,7 +235,6 @@ async def handle_like_back(
     """Обработка ответного лайка."""
     data = await state.get_data()
     current_liked_user_id = data.get("current_liked_user_id")
-    current_index = data.get("current_like_index", 0)
     
     if not current_liked_user_id:
         await message.answer("❌ Ошибка")
@@ -258,23 +260,15 @@ async def handle_like_back(
     # Делаем commit сразу после всех операций
     await session.commit()
     
-    liked_user = await UserRepository.get_by_id(session, current_liked_user_id)
-    liked_user = await UserRepository.get_with_university(session, liked_user.id)
+    liked_user = await UserRepository.get_with_university(session, current_liked_user_id)
     
-    # Уведомление уже отправляется в NotificationService.notify_match
-    await NotificationService.notify_match(
+    # Уведомление о мэтче уходит в фоне, следующий лайк показывается сразу
+    NotificationService.notify_match_later(
         message.bot,
-        session,
         user,
         liked_user
     )
     
-    # Удаляем обработанного пользователя из списка
-    liked_user_ids = data.get("liked_user_ids", [])
-    if current_liked_user_id in liked_user_ids:
-        liked_user_ids.remove(current_liked_user_id)
-        await state.update_data(liked_user_ids=liked_user_ids)
-    
     # Удаляем предыдущие сообщения перед показом следующего
     prev_messages = data.get("prev_like_messages", [])
     for msg_id in prev_messages:
@@ -283,7 +277,7 @@ async def handle_like_back(
         except:
             pass
     
-    # Переходим к следующему лайку (индекс не увеличиваем, так как удалили элемент)
+    # Переходим к следующему лайку после курсора
     await show_current_like(message, session, state)
 
 
@@ -296,7 +290,6 @@ async def handle_dislike_back(
     """Обработка дизлайка."""
     data = await state.get_data()
     current_liked_user_id = data.get("current_liked_user_id")
-    current_index = data.get("current_like_index", 0)
     
     if not current_liked_user_id:
         await message.answer("❌ Ошибка")
@@ -304,21 +297,22 @@ async def handle_dislike_back(
     
     user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
     
-    # Создаем дизлайк
-    await LikeRepository.create(
-        session,
-        from_user_id=user.id,
-        to_user_id=current_liked_user_id,
-        is_like=False
-    )
-    
-    await session.commit()
-    
-    # Удаляем обработанного пользователя из списка
-    liked_user_ids = data.get("liked_user_ids", [])
-    if current_liked_user_id in liked_user_ids:
-        liked_user_ids.remove(current_liked_user_id)
-        await state.update_data(liked_user_ids=liked_user_ids)
+    # При STORE_DISLIKES=0 ответный дизлайк ничего не пишет
+    if not Config.STORE_DISLIKES:
+        pass
+    elif Config.SWIPE_BUFFER_ENABLED:
+        # Дизлайк никем не читается сразу — пишем его в фоне
+        swipe_buffer.dislike(user.id, current_liked_user_id, viewed=False)
+    else:
+        # Создаем дизлайк
+        await LikeRepository.create(
+            session,
+            from_user_id=user.id,
+            to_user_id=current_liked_user_id,
+            is_like=False
+        )
+        
+        await session.commit()
     
     # Удаляем предыдущие сообщения перед показом следующего
     prev_messages = data.get("prev_like_messages", [])
@@ -328,7 +322,7 @@ async def handle_dislike_back(
         except:
             pass
     
-    # Переходим к следующему лайку (индекс не увеличиваем, так как удалили элемент)
+    # Переходим к следующему лайку после курсора
     await show_current_like(message, session, state)
 
 
@@ -1,5 +1,6 @@
 """Обработчики взаимных симпатий."""
 import asyncio
+from datetime import datetime
 
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
@@ -68,9 +69,9 @@ async def show_matches(
         except:
             pass
     
-    matches = await MatchRepository.get_user_matches(session, user.id)
+    matches_total = await MatchRepository.count_user_matches(session, user.id)
     
-    if not matches:
+    if not matches_total:
         # Отправляем сообщение об отсутствии мэтчей
         await message.answer(TEXTS["no_matches"])
         # Отправляем главное меню отдельным сообщением с удалением предыдущих
@@ -83,36 +84,14 @@ async def show_matches(
         )
         return
     
-    # Сохраняем мэтчи в состоянии (исключаем свою анкету)
-    match_partners = []
-    for match in matches:
-        # Получаем партнера напрямую из мэтча
-        if match.user1_id == user.id:
-            partner_id = match.user2_id
-        else:
-            partner_id = match.user1_id
-        
-        # Проверяем, что партнер не сам пользователь
-        if partner_id != user.id:
-            # Загружаем партнера с университетом
-            partner = await UserRepository.get_by_id(session, partner_id)
-            if partner:
-                partner = await UserRepository.get_with_university(session, partner.id)
-                match_partners.append(partner.id)
-    
-    # Проверяем, есть ли мэтчи после фильтрации
-    if not match_partners:
-        await message.answer(TEXTS["no_matches"])
-        from app.utils.menu_helpers import send_main_menu_with_cleanup
-        await send_main_menu_with_cleanup(
-            message.bot,
-            message.chat.id,
-            state,
-            user.show_in_search
-        )
-        return
-    
-    await state.update_data(matches=match_partners, current_match_index=0, prev_match_messages=[])
+    # В FSM храним только курсор текущего мэтча, партнёры грузятся при показе
+    await state.update_data(
+        match_viewer_id=user.id,
+        match_cursor=None,
+        current_match_index=0,
+        matches_total=matches_total,
+        prev_match_messages=[]
+    )
     await state.set_state(MatchesStates.viewing_matches)
     
     # Устанавливаем простую reply-клавиатуру с одной кнопкой "Смотреть анкеты"
@@ -128,13 +107,31 @@ async def show_matches(
 async def show_current_match(
     message: Message,
     session: AsyncSession,
-    state: FSMContext
-) -> None:
-    """Показать текущий мэтч."""
+    state: FSMContext,
+    backward: bool = False
+) -> bool:
+    """Показать следующий (или при backward — предыдущий) мэтч.
+    
+    Партнёр с вузом загружается одним запросом по курсору из FSM.
+    Возвращает False, если в эту сторону мэтчей больше нет.
+    """
     data = await state.get_data()
-    match_ids = data.get("matches", [])
+    cursor = data.get("match_cursor")
     current_index = data.get("current_match_index", 0)
     
+    # В колбэках message.from_user — бот, поэтому ID зрителя берём из FSM
+    viewer_id = data.get("match_viewer_id")
+    page = await MatchRepository.get_partners_page(
+        session,
+        viewer_id,
+        cursor=(datetime.fromisoformat(cursor[0]), cursor[1]) if cursor else None,
+        backward=backward
+    )
+    
+    if not page and cursor is not None:
+        # Дальше в эту сторону мэтчей нет, остаёмся на текущем
+        return False
+    
     # Удаляем предыдущие сообщения, если они есть
     prev_messages = data.get("prev_match_messages", [])
     for msg_id in prev_messages:
@@ -143,10 +140,10 @@ async def show_current_match(
         except:
             pass
     
-    if not match_ids or current_index >= len(match_ids):
+    if not page:
         # Мэтчи закончились
         await state.clear()
-        user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
+        user = await UserRepository.get_by_id(session, viewer_id)
         from app.utils.menu_helpers import send_main_menu_with_cleanup
         await send_main_menu_with_cleanup(
             message.bot,
@@ -154,15 +151,19 @@ async def show_current_match(
             state,
             user.show_in_search
         )
-        return
-    
-    # Получаем текущего партнера
-    partner = await UserRepository.get_by_id(session, match_ids[current_index])
-    partner = await UserRepository.get_with_university(session, partner.id)
+        return False
+    
+    match, partner = page[0]
+    if cursor is not None:
+        current_index += -1 if backward else 1
+    await state.update_data(
+        match_cursor=[match.created_at.isoformat(), match.id],
+        current_match_index=current_index
+    )
     
     # Показываем анкету с счетчиком
     current_num = current_index + 1
-    total = len(match_ids)
+    total = max(data.get("matches_total", 0), current_num)
     counter_text = f"\n\n{current_num}/{total}"
     
     # Отправляем анкету с счетчиком в caption и кнопками
@@ -183,6 +184,7 @@ async def show_current_match(
     
     # Сохраняем ID сообщений для последующего удаления
     await state.update_data(prev_match_messages=message_ids)
+    return True
 
 
 @router.callback_query(F.data == "prev_match", MatchesStates.viewing_matches)
@@ -194,13 +196,7 @@ async def handle_prev_match(
     """Перейти к предыдущему мэтчу."""
     await callback.answer()
     
-    data = await state.get_data()
-    current_index = data.get("current_match_index", 0)
-    
-    if current_index > 0:
-        await state.update_data(current_match_index=current_index - 1)
-        await show_current_match(callback.message, session, state)
-    else:
+    if not await show_current_match(callback.message, session, state, backward=True):
         await callback.answer("Это первый мэтч", show_alert=True)
 
 
@@ -213,14 +209,7 @@ async def handle_next_match(
     """Перейти к следующему мэтчу."""
     await callback.answer()
     
-    data = await state.get_data()
-    match_ids = data.get("matches", [])
-    current_index = data.get("current_match_index", 0)
-    
-    if current_index < len(match_ids) - 1:
-        await state.update_data(current_match_index=current_index + 1)
-        await show_current_match(callback.message, session, state)
-    else:
+    if not await show_current_match(callback.message, session, state):
         await callback.answer("Это последний мэтч", show_alert=True)
 
 
@@ -48,7 +48,7 @@ async def start_viewing_from_profile(
     await state.set_state(ViewingStates.viewing_profiles)
     # Клавиатура будет установлена в show_next_profile
     from app.handlers.viewing import show_next_profile
-    await show_next_profile(message, session, state)
+    await show_next_profile(message, session, state, resume=True)
 
 
 @router.message(F.text == "2", ProfileMenuStates.in_profile_menu)
@@ -555,14 +555,10 @@ async def handle_university_selection_via_bot_edit(
     # Извлекаем аббревиатуру из текста сообщения (убираем #)
     short_name = message.text[1:].strip()
     
-    # Ищем университет по аббревиатуре
-    from app.database.repositories.university_repo import UniversityRepository
-    universities = await UniversityRepository.get_all_active(session)
-    university = None
-    for uni in universities:
-        if uni.short_name == short_name:
-            university = uni
-            break
+    # Ищем университет по аббревиатуре в каталоге в памяти
+    from app.services.university_catalog import university_catalog
+    await university_catalog.ensure_loaded(session)
+    university = university_catalog.get_by_short_name(short_name)
     
     if not university:
         await message.answer("❌ Университет не найден")
@@ -1,5 +1,4 @@
 """Обработчики регистрации."""
-from typing import List
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineQuery, InlineQueryResultArticle, InputTextMessageContent
 from aiogram.fsm.context import FSMContext
@@ -15,13 +14,10 @@ from app.utils.text_templates import TEXTS
 from app.utils.helpers import validate_name, validate_age, validate_bio
 from app.states.states import RegistrationStates
 from app.utils.helpers import send_profile
+from app.services.university_catalog import university_catalog
 
 router = Router()
 
-# Храним выбранные университеты для пагинации
-UNIVERSITIES_CACHE: List = []
-
-
 @router.message(RegistrationStates.waiting_for_university, ~F.via_bot)
 async def show_universities(
     message: Message,
@@ -33,12 +29,9 @@ async def show_universities(
     if message.via_bot:
         return
     
-    global UNIVERSITIES_CACHE
-    
-    if not UNIVERSITIES_CACHE:
-        UNIVERSITIES_CACHE = await UniversityRepository.get_all_active(session)
+    await university_catalog.ensure_loaded(session)
     
-    if not UNIVERSITIES_CACHE:
+    if not university_catalog.all():
         await message.answer(
             "❌ Пока нет доступных университетов. Обратитесь к администратору."
         )
@@ -66,10 +59,10 @@ async def handle_inline_query(
     if not query_lower.startswith("uni"):
         return
     
-    # Получаем все активные университеты
-    universities = await UniversityRepository.get_all_active(session)
+    # Университеты ищем в каталоге в памяти, без запроса к БД на каждый символ
+    await university_catalog.ensure_loaded(session)
     
-    if not universities:
+    if not university_catalog.all():
         await inline_query.answer(
             results=[],
             cache_time=1
@@ -78,16 +71,13 @@ async def handle_inline_query(
     
     # Фильтруем университеты по запросу (если есть текст после "uni")
     query_text = query_lower.replace("uni", "").strip()
-    if query_text:
-        universities = [
-            uni for uni in universities
-            if query_text in uni.name.lower() or query_text in uni.short_name.lower() or query_text in uni.city.lower()
-        ]
+    # Telegram ограничивает до 50 результатов
+    universities = university_catalog.search(query_text, limit=50)
     
     # Создаем результаты для inline-запроса
     # title = аббревиатура, description = полное название - город
     results = []
-    for uni in universities[:50]:  # Telegram ограничивает до 50 результатов
+    for uni in universities:
         results.append(
             InlineQueryResultArticle(
                 id=f"uni_{uni.id}",
@@ -136,13 +126,10 @@ async def handle_university_selection_via_bot(
     logger.info(f"Ищем университет с аббревиатурой: {short_name}")
     
     # Ищем университет по аббревиатуре
-    universities = await UniversityRepository.get_all_active(session)
-    university = None
-    for uni in universities:
-        if uni.short_name == short_name:
-            university = uni
-            logger.info(f"Найден университет: {university.name}")
-            break
+    await university_catalog.ensure_loaded(session)
+    university = university_catalog.get_by_short_name(short_name)
+    if university:
+        logger.info(f"Найден университет: {university.name}")
     
     if not university:
         logger.warning(f"Университет с аббревиатурой {short_name} не найден")
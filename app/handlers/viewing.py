@@ -4,11 +4,14 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import Config
+from app.middlewares.outbound_middleware import background_sends
 from app.database.repositories.user_repo import UserRepository
 from app.database.repositories.like_repo import LikeRepository
-from app.database.repositories.match_repo import MatchRepository
 from app.services.matching_service import MatchingService
 from app.services.notification_service import NotificationService
+from app.services.swipe_buffer import swipe_buffer
+from app.services.swipe_service import SwipeService
 from app.keyboards.inline import report_button_kb, continue_viewing_kb
 from app.keyboards.reply import main_menu_kb, viewing_profile_kb, super_favorite_kb
 from app.utils.text_templates import TEXTS
@@ -18,6 +21,23 @@ from app.states.states import ViewingStates
 router = Router()
 
 
+def delete_messages_later(bot, chat_id: int, message_ids) -> None:
+    """Удалить сообщения в фоне, не задерживая ответ пользователю."""
+    import asyncio
+
+    async def delete_messages():
+        # Удаление ждёт в очереди отправок после ответов пользователям
+        with background_sends():
+            for msg_id in message_ids:
+                try:
+                    await bot.delete_message(chat_id=chat_id, message_id=msg_id)
+                except:
+                    pass
+
+    if message_ids:
+        asyncio.create_task(delete_messages())
+
+
 @router.message(F.text == "1")
 async def start_viewing(
     message: Message,
@@ -62,24 +82,36 @@ async def start_viewing(
     
     await state.set_state(ViewingStates.viewing_profiles)
     # Клавиатура будет установлена в show_next_profile
-    await show_next_profile(message, session, state)
+    await show_next_profile(message, session, state, resume=True)
 
 
 async def show_next_profile(
     message: Message,
     session: AsyncSession,
-    state: FSMContext
+    state: FSMContext,
+    resume: bool = False
 ) -> None:
-    """Показать следующую анкету."""
-    # UserRepository уже импортирован в начале файла
+    """Показать следующую анкету.
+    
+    resume=True — вход в ленту без свайпа: анкета, оставшаяся без ответа,
+    показывается снова.
+    """
+    # Пользователь с вузом уже загружен UserLoader'ом, повторных запросов нет
     user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
     user = await UserRepository.get_with_university(session, user.id)
     
-    next_profile = await MatchingService.get_next_profile(session, user)
+    data = await state.get_data()
+    prev_messages = data.get("prev_messages", [])
+    next_profile = await MatchingService.get_next_profile(
+        session,
+        user,
+        MatchingService.load_cursor(data.get("feed_cursor")),
+        resume=resume
+    )
     
     if not next_profile:
+        delete_messages_later(message.bot, message.chat.id, prev_messages)
         await state.clear()
-        user = await UserRepository.get_by_telegram_id(session, message.from_user.id)
         # Отправляем сообщение об окончании анкет
         await message.answer(TEXTS["no_profiles"])
         # Отправляем меню отдельным сообщением с удалением предыдущих
@@ -93,17 +125,11 @@ async def show_next_profile(
         return
     
     # НЕ помечаем как просмотренную здесь - только после действия пользователя
-    # Сохраняем ID текущей анкеты в состоянии
-    await state.update_data(current_profile_id=next_profile.id)
-    
-    # Удаляем предыдущие сообщения, если они есть
-    data = await state.get_data()
-    prev_messages = data.get("prev_messages", [])
-    for msg_id in prev_messages:
-        try:
-            await message.bot.delete_message(chat_id=message.chat.id, message_id=msg_id)
-        except:
-            pass
+    # Сохраняем ID текущей анкеты и позицию в ленте в состоянии
+    await state.update_data(
+        current_profile_id=next_profile.id,
+        feed_cursor=MatchingService.dump_cursor(next_profile)
+    )
     
     # Если анкета "особенная" (режим 😍), убираем старую клавиатуру и показываем другую
     if next_profile.is_super_favorite:
@@ -148,6 +174,10 @@ async def show_next_profile(
         message_ids.append(profile_msg.message_id)
     
     await state.update_data(prev_messages=message_ids)
+    
+    # Предыдущую анкету удаляем уже после отправки новой: пользователь
+    # не ждёт лишних запросов к Telegram между свайпом и следующей анкетой
+    delete_messages_later(message.bot, message.chat.id, prev_messages)
 
 
 @router.message(F.text == "❤️", ViewingStates.viewing_profiles)
@@ -184,65 +214,29 @@ async def handle_like_callback(
         await message_or_callback.answer("❌ Ошибка")
         return
     
-    # Удаляем предыдущие сообщения
-    prev_messages = data.get("prev_messages", [])
-    chat_id = message_or_callback.chat.id if hasattr(message_or_callback, 'chat') else message_or_callback.message.chat.id
-    for msg_id in prev_messages:
-        try:
-            await message_or_callback.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-        except:
-            pass
-    
-    # Создаем лайк (каждый раз отдельная запись)
-    await LikeRepository.create(
-        session,
-        from_user_id=user.id,
-        to_user_id=current_profile_id,
-        is_like=True
-    )
-    
-    # Помечаем анкету как просмотренную только после действия
-    await MatchingService.mark_as_viewed(session, user.id, current_profile_id)
+    # Предыдущие сообщения удалит show_next_profile после отправки новой анкеты
     
-    # Проверяем на взаимный лайк
-    has_mutual = await LikeRepository.check_mutual_like(
-        session,
-        user.id,
-        current_profile_id
-    )
+    # Лайк, отметка просмотра, проверка встречного лайка и мэтч — одним запросом.
+    # При мэтче лайки и просмотры между пользователями удаляются,
+    # чтобы следующие лайки работали как "с нуля".
+    swipe = await SwipeService.like(session, user.id, current_profile_id)
+    # Делаем commit перед отправкой уведомлений
+    await session.commit()
     
-    if has_mutual:
-        # Новый взаимный лайк -> создаём новый мэтч
-        await MatchRepository.create(session, user.id, current_profile_id)
-        # После создания мэтча удаляем все лайки и просмотры между пользователями,
-        # чтобы следующие лайки работали как "с нуля".
-        await LikeRepository.delete_between_users(session, user.id, current_profile_id)
-        await MatchingService.reset_views_between_users(session, user.id, current_profile_id)
-        # Делаем commit сразу после всех операций
-        await session.commit()
-        
-        to_user = await UserRepository.get_by_id(session, current_profile_id)
-        to_user = await UserRepository.get_with_university(session, to_user.id)
-        
+    # Уведомления уходят в фоне, следующая анкета показывается сразу
+    if swipe.matched:
         # Отправляем уведомления о мэтче
-        await NotificationService.notify_match(
+        NotificationService.notify_match_later(
             message_or_callback.bot,
-            session,
-            user,
-            to_user
+            swipe.user,
+            swipe.partner
         )
-    else:
-        # Делаем commit перед отправкой уведомлений
-        await session.commit()
-        
+    elif swipe.partner:
         # Отправляем уведомление получателю о новом лайке
-        to_user = await UserRepository.get_by_id(session, current_profile_id)
-        if to_user:
-            await NotificationService.notify_like(
-                message_or_callback.bot,
-                session,
-                to_user
-            )
+        NotificationService.notify_like_later(
+            message_or_callback.bot,
+            swipe.partner
+        )
     
     # Показываем следующую анкету
     msg_obj = message_or_callback if hasattr(message_or_callback, 'chat') else message_or_callback.message
@@ -284,27 +278,25 @@ async def handle_dislike_callback(
         await message_or_callback.answer("❌ Ошибка")
         return
     
-    # Удаляем предыдущие сообщения
-    prev_messages = data.get("prev_messages", [])
-    chat_id = message_or_callback.chat.id if hasattr(message_or_callback, 'chat') else message_or_callback.message.chat.id
-    for msg_id in prev_messages:
-        try:
-            await message_or_callback.bot.delete_message(chat_id=chat_id, message_id=msg_id)
-        except:
-            pass
-    
-    # Создаем дизлайк
-    await LikeRepository.create(
-        session,
-        from_user_id=user.id,
-        to_user_id=current_profile_id,
-        is_like=False
-    )
-    
-    # Помечаем анкету как просмотренную только после действия
-    await MatchingService.mark_as_viewed(session, user.id, current_profile_id)
+    # Предыдущие сообщения удалит show_next_profile после отправки новой анкеты
     
-    await session.commit()
+    if Config.SWIPE_BUFFER_ENABLED:
+        # Дизлайк не даёт мэтча и никем не читается сразу — пишем его в фоне
+        swipe_buffer.dislike(user.id, current_profile_id)
+    else:
+        # Создаем дизлайк (при STORE_DISLIKES=0 хватает отметки просмотра)
+        if Config.STORE_DISLIKES:
+            await LikeRepository.create(
+                session,
+                from_user_id=user.id,
+                to_user_id=current_profile_id,
+                is_like=False
+            )
+        
+        # Помечаем анкету как просмотренную только после действия
+        await MatchingService.mark_as_viewed(session, user.id, current_profile_id)
+        
+        await session.commit()
     
     # Показываем следующую анкету
     msg_obj = message_or_callback if hasattr(message_or_callback, 'chat') else message_or_callback.message
@@ -397,7 +389,7 @@ async def process_message(
             await state.update_data(prev_messages=message_ids)
         else:
             # Если нет сохраненной анкеты, показываем следующую
-            await show_next_profile(message, session, state)
+            await show_next_profile(message, session, state, resume=True)
         return
     
     if not validate_message(message.text):
@@ -413,72 +405,32 @@ async def process_message(
         await message.answer("❌ Ошибка")
         return
     
-    # Создаем лайк с сообщением
-    await LikeRepository.create(
-        session,
-        from_user_id=user.id,
-        to_user_id=current_profile_id,
-        is_like=True,
-        message=message.text
-    )
-    
-    # Помечаем анкету как просмотренную только после действия
-    await MatchingService.mark_as_viewed(session, user.id, current_profile_id)
-    
-    # Проверяем на взаимный лайк
-    has_mutual = await LikeRepository.check_mutual_like(
+    # Лайк с сообщением, отметка просмотра, проверка встречного лайка и мэтч —
+    # одним запросом, как и у обычного лайка
+    swipe = await SwipeService.like(
         session,
         user.id,
-        current_profile_id
+        current_profile_id,
+        message=message.text
     )
+    # Делаем commit перед отправкой уведомлений
+    await session.commit()
     
-    if has_mutual:
-        # Создаем мэтч
-        match_exists = await MatchRepository.check_match_exists(
-            session,
-            user.id,
-            current_profile_id
+    # Уведомления уходят в фоне, следующая анкета показывается сразу
+    if swipe.matched:
+        NotificationService.notify_match_later(
+            message.bot,
+            swipe.user,
+            swipe.partner
         )
-        
-        if not match_exists:
-            await MatchRepository.create(session, user.id, current_profile_id)
-            # Делаем commit сразу после создания мэтча
-            await session.commit()
-            
-            to_user = await UserRepository.get_by_id(session, current_profile_id)
-            to_user = await UserRepository.get_with_university(session, to_user.id)
-            
-            # Отправляем уведомления о мэтче
-            await NotificationService.notify_match(
-                message.bot,
-                session,
-                user,
-                to_user
-            )
-        else:
-            await session.commit()
-    else:
-        # Делаем commit перед отправкой уведомлений
-        await session.commit()
-        
+    elif swipe.partner:
         # Отправляем уведомление получателю о новом лайке
-        to_user = await UserRepository.get_by_id(session, current_profile_id)
-        if to_user:
-            await NotificationService.notify_like(
-                message.bot,
-                session,
-                to_user
-            )
-    
-    # Удаляем предыдущие сообщения
-    data = await state.get_data()
-    prev_messages = data.get("prev_messages", [])
-    for msg_id in prev_messages:
-        try:
-            await message.bot.delete_message(chat_id=message.chat.id, message_id=msg_id)
-        except:
-            pass
+        NotificationService.notify_like_later(
+            message.bot,
+            swipe.partner
+        )
     
+    # Предыдущие сообщения удалит show_next_profile после отправки новой анкеты
     await state.set_state(ViewingStates.viewing_profiles)
     await show_next_profile(message, session, state)
 
@@ -542,7 +494,7 @@ async def handle_continue_viewing(
     await callback.answer()
     await state.set_state(ViewingStates.viewing_profiles)
     await callback.message.delete()
-    await show_next_profile(callback.message, session, state)
+    await show_next_profile(callback.message, session, state, resume=True)
 
 
 @router.callback_query(F.data == "go_menu")
@@ -5,6 +5,7 @@ from aiogram.types import TelegramObject
 from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from app.database.engine import async_session_maker
+from app.services.user_loader import UserLoader
 
 
 class DbSessionMiddleware(BaseMiddleware):
@@ -18,6 +19,12 @@ class DbSessionMiddleware(BaseMiddleware):
     ) -> Any:
         async with async_session_maker() as session:
             data["session"] = session
+            # Автор апдейта грузится один раз на всю цепочку middleware и обработчик
+            from_user = data.get("event_from_user")
+            data["user_loader"] = UserLoader(
+                session,
+                from_user.id if from_user else None
+            ).attach()
             try:
                 return await handler(event, data)
             finally:
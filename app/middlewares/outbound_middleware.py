@@ -0,0 +1,205 @@
+"""Ограничение скорости исходящих запросов к Telegram Bot API."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Iterator, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+# Полосы очереди: меньше — раньше
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Методы, которые создают новое сообщение в чате
+_SENDING_PREFIXES = ("Send", "Copy", "Forward")
+
+_send_priority: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_sends() -> Iterator[None]:
+    """Запросы внутри блока пропускают вперёд ответы на действия пользователей.
+
+    Для уведомлений, рассылок и фонового удаления сообщений.
+    """
+    token = _send_priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _send_priority.reset(token)
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, в запасе не больше burst."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Через сколько секунд появится свободный токен."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Занять токен заранее; вернуть, сколько ждать, пока он появится."""
+        self._refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Не выдавать токены ближайшие seconds секунд."""
+        self._refill(now)
+        # Через seconds секунд наберётся ровно один токен
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class OutboundRateLimitMiddleware(BaseRequestMiddleware):
+    """Очередь всех запросов бота, адресованных чатам.
+
+    Подключается к bot.session, поэтому через неё проходят все отправки:
+    ответы обработчиков, send_profile, уведомления, рассылки. Каждый запрос
+    с chat_id ждёт общий токен, а отправка нового сообщения — ещё и токен
+    своего чата. Токены раздаются по полосам: запросы из background_sends()
+    получают их, только когда нет готовых интерактивных; внутри полосы и
+    чата порядок сохраняется. На 429 все запросы (и чат отправки) ставятся
+    на паузу retry_after, после чего запрос повторяется.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: float,
+        chat_rate: float,
+        chat_burst: float,
+        max_retries: int,
+        max_chats: int = 10000
+    ) -> None:
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: "OrderedDict[Union[int, str], TokenBucket]" = OrderedDict()
+        # Полосы по приоритету: (чат или None, ожидающий) в порядке прихода
+        self._lanes: Tuple[Deque[Tuple[Optional[Union[int, str]], asyncio.Future]], ...] = (
+            deque(), deque()
+        )
+        self._wakeup = asyncio.Event()
+        self._pump: Optional[asyncio.Task] = None
+        self.retried = 0
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # getUpdates, answerCallbackQuery и т. п. не ограничиваем
+            return await make_request(bot, method)
+
+        priority = _send_priority.get()
+        # Лимит чата Telegram считает по новым сообщениям; удаление и
+        # редактирование идут только под общий лимит
+        per_chat = type(method).__name__.startswith(_SENDING_PREFIXES)
+        attempt = 0
+        while True:
+            await self._acquire(chat_id if per_chat else None, priority)
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                self.retried += 1
+                logger.warning(
+                    f"429 для чата {chat_id}, повтор {attempt} через {e.retry_after} с"
+                )
+                # 429 обычно значит, что упёрлись в общий лимит бота, поэтому
+                # паузу получает общее ведро (через него идёт и повтор), а для
+                # отправок — ещё и ведро чата
+                now = time.monotonic()
+                self._global.pause(now, e.retry_after)
+                if per_chat:
+                    self._chat_bucket(chat_id).pause(now, e.retry_after)
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            while len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        self._chats.move_to_end(chat_id)
+        return bucket
+
+    async def _acquire(self, chat_id: Optional[Union[int, str]], priority: int) -> None:
+        """Встать в очередь своей полосы и дождаться токенов."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append((chat_id, waiter))
+        self._wakeup.set()
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.create_task(self._run_pump())
+        await waiter
+
+    def _grant_next(self, now: float) -> float:
+        """Выдать токены первому готовому ожидающему.
+
+        Возвращает 0, если кто-то получил токены, иначе — через сколько
+        секунд освободится ближайший чат.
+        """
+        soonest = float("inf")
+        for lane in self._lanes:
+            for pos, (chat_id, waiter) in enumerate(lane):
+                if waiter.done():
+                    # Запрос отменили, пока он стоял в очереди
+                    del lane[pos]
+                    return 0.0
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+                wait = bucket.wait_time(now) if bucket is not None else 0.0
+                if wait > 0:
+                    soonest = min(soonest, wait)
+                    continue
+                del lane[pos]
+                if bucket is not None:
+                    bucket.reserve(now)
+                self._global.reserve(now)
+                waiter.set_result(None)
+                return 0.0
+        return soonest
+
+    async def _run_pump(self) -> None:
+        """Раздавать токены: сначала интерактивной полосе, потом фоновой."""
+        while any(self._lanes):
+            wait = self._global.wait_time(time.monotonic())
+            if wait <= 0:
+                wait = self._grant_next(time.monotonic())
+                if wait <= 0:
+                    continue
+            # Ждём освобождения токена или нового запроса в очереди
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,98 @@
+"""Отложенная запись last_active."""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import ARRAY, DateTime, Integer, cast, func, select, update
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastActiveTracker:
+    """Время последней активности, которое пишется в users пачкой.
+
+    touch только запоминает время в памяти; раз в flush_interval секунд все
+    накопленные значения уходят одним UPDATE ... FROM unnest(...). Лента
+    терпит отставание last_active на несколько секунд, а индекс ленты
+    обновляется сразу, без ожидания записи.
+    """
+
+    def __init__(self, flush_interval: float) -> None:
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, user_id: int, when: datetime) -> None:
+        """Запомнить активность пользователя."""
+        self._pending[user_id] = when
+
+    async def flush(self) -> int:
+        """Записать накопленные значения. Возвращает число пользователей."""
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            # Два массива вместо VALUES: два параметра при любом размере пачки
+            # и явные типы колонок для asyncpg
+            touched = select(
+                func.unnest(cast(list(pending.keys()), ARRAY(Integer))).label("id"),
+                func.unnest(cast(list(pending.values()), ARRAY(DateTime))).label("last_active"),
+            ).subquery("touched")
+            stmt = (
+                update(User)
+                .where(
+                    User.id == touched.c.id,
+                    # Не откатываем время, записанное другим процессом позже
+                    User.last_active < touched.c.last_active
+                )
+                .values(
+                    last_active=touched.c.last_active,
+                    # last_active — не правка анкеты, onupdate для updated_at не нужен
+                    updated_at=User.updated_at
+                )
+            )
+            try:
+                async with async_session_maker() as session:
+                    await session.execute(stmt)
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Не удалось записать last_active для {len(pending)} пользователей: {e}")
+                # Вернём значения в очередь, если их не перезаписали новые
+                for user_id, when in pending.items():
+                    self._pending.setdefault(user_id, when)
+            return len(pending)
+
+    async def _run(self) -> None:
+        """Записывать накопленное по таймеру."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Запустить фоновую запись."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую запись и дописать накопленное."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+last_active_tracker = LastActiveTracker(flush_interval=Config.LAST_ACTIVE_FLUSH_SECONDS)
@@ -0,0 +1,102 @@
+"""Множество забаненных пользователей в памяти процесса."""
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class BanList:
+    """Telegram ID забаненных пользователей.
+
+    Загружается при старте и меняется точечно из UserRepository.update, через
+    который проходят бан и разбан в админке. Периодическая перезагрузка
+    подхватывает баны, сделанные другими процессами (например, прямо в БД).
+    Проверка в BanCheckMiddleware — поиск в множестве без запроса к БД.
+
+    Перезагрузка заменяет множество снимком из БД, а бан или разбан,
+    закоммиченный, пока шёл запрос, в снимок может не попасть. Поэтому
+    изменения из sync_user на время загрузки запоминаются и накладываются
+    на снимок перед заменой.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._banned: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+        # Изменения, сделанные во время идущих загрузок: telegram_id -> забанен ли
+        self._changes: Dict[int, bool] = {}
+        self._loading = 0
+
+    def __contains__(self, telegram_id: int) -> bool:
+        return telegram_id in self._banned
+
+    def __len__(self) -> int:
+        return len(self._banned)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Перечитать множество из таблицы users."""
+        if not self._loading:
+            self._changes = {}
+        self._loading += 1
+        try:
+            result = await session.scalars(
+                select(User.telegram_id).where(User.is_banned == True)
+            )
+            banned = set(result)
+        finally:
+            self._loading -= 1
+        for telegram_id, is_banned in self._changes.items():
+            if is_banned:
+                banned.add(telegram_id)
+            else:
+                banned.discard(telegram_id)
+        self._banned = banned
+
+    def sync_user(self, user: Optional[User]) -> None:
+        """Обновить запись пользователя после изменения его is_banned."""
+        if user is None:
+            return
+        if self._loading:
+            self._changes[user.telegram_id] = user.is_banned
+        if user.is_banned:
+            self._banned.add(user.telegram_id)
+        else:
+            self._banned.discard(user.telegram_id)
+
+    async def _run(self) -> None:
+        """Перечитывать множество по таймеру."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                async with async_session_maker() as session:
+                    await self.load(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Не удалось обновить список банов: {e}")
+
+    def start(self) -> None:
+        """Запустить периодическую перезагрузку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить периодическую перезагрузку."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+ban_list = BanList(refresh_interval=Config.BAN_LIST_REFRESH_SECONDS)
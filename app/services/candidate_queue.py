@@ -0,0 +1,293 @@
+"""Буфер кандидатов для ленты анкет."""
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.models import User
+from app.services.ban_list import ban_list
+from app.services.matching_service import FeedCursor, FeedViewer, MatchingService
+from app.services.ranking import rank_candidates
+
+logger = logging.getLogger(__name__)
+
+
+class _ViewerQueue:
+    """Буфер одного зрителя."""
+
+    __slots__ = (
+        "viewer", "ids", "current_id", "ahead_id", "rejected", "cursor", "exhausted",
+        "refill_task", "lookahead_task"
+    )
+
+    def __init__(self, viewer: FeedViewer, cursor: Optional[FeedCursor] = None) -> None:
+        self.viewer = viewer
+        self.ids: Deque[int] = deque()
+        # Анкета, которая сейчас на экране (ещё не помечена просмотренной)
+        self.current_id: Optional[int] = None
+        # Анкета, которую подготавливает или уже подготовил look-ahead
+        self.ahead_id: Optional[int] = None
+        # Анкеты, не прошедшие перепроверку при выдаче. Индекс ленты может
+        # ещё держать их (их скрыли в другом процессе), и без исключения
+        # дозагрузка возвращала бы их снова и снова
+        self.rejected: Set[int] = set()
+        # (last_active, id) последней загруженной анкеты — с него продолжается лента
+        self.cursor = cursor
+        # Последняя дозагрузка вернула неполную пачку — кандидатов больше нет
+        self.exhausted = False
+        self.refill_task: Optional[asyncio.Task] = None
+        self.lookahead_task: Optional[asyncio.Task] = None
+
+    def cancel_tasks(self) -> None:
+        """Остановить фоновые задачи буфера."""
+        for task in (self.refill_task, self.lookahead_task):
+            if task is not None:
+                task.cancel()
+
+    def excluded_ids(self) -> Set[int]:
+        """ID, которые уже лежат в буфере, показаны или отбракованы."""
+        excluded = set(self.ids) | self.rejected
+        if self.current_id is not None:
+            excluded.add(self.current_id)
+        if self.ahead_id is not None:
+            excluded.add(self.ahead_id)
+        return excluded
+
+
+class CandidateQueue:
+    """Очередь подобранных анкет для каждого зрителя.
+
+    Вместо тяжёлого запроса ленты на каждый свайп подбираем сразу пачку
+    кандидатов и отдаём их из памяти. Когда в буфере остаётся меньше
+    low_water анкет, следующая пачка догружается в фоне.
+
+    Пачки берутся по keyset-курсору (last_active, id): каждый запрос
+    продолжает ленту с места, где закончился предыдущий, а дойдя до
+    конца, лента начинается сверху.
+
+    В режиме look-ahead, пока зритель смотрит текущую анкету, следующая
+    уже достаётся из буфера, проверяется и загружается вместе с вузом,
+    так что на свайп остаётся только отправка в Telegram. За время просмотра
+    анкету могли забанить или скрыть, поэтому при выдаче она проверяется
+    ещё раз: по списку банов в памяти и одним запросом по первичному ключу.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        low_water: int,
+        max_viewers: int
+    ) -> None:
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.max_viewers = max_viewers
+        self._queues: "OrderedDict[int, _ViewerQueue]" = OrderedDict()
+
+    def _get_queue(
+        self,
+        viewer: FeedViewer,
+        cursor: Optional[FeedCursor] = None
+    ) -> _ViewerQueue:
+        """Получить буфер зрителя (с вытеснением самых старых)."""
+        queue = self._queues.get(viewer.id)
+        if queue is not None and queue.viewer != viewer:
+            # Сменился вуз, пол или кого ищет — старые кандидаты не подходят
+            self.invalidate(viewer.id)
+            queue = None
+
+        if queue is None:
+            queue = _ViewerQueue(viewer, cursor)
+            self._queues[viewer.id] = queue
+            while len(self._queues) > self.max_viewers:
+                _, evicted = self._queues.popitem(last=False)
+                evicted.cancel_tasks()
+        else:
+            self._queues.move_to_end(viewer.id)
+        return queue
+
+    def invalidate(self, viewer_id: int) -> None:
+        """Сбросить буфер зрителя (например, после сброса просмотров)."""
+        queue = self._queues.pop(viewer_id, None)
+        if queue:
+            queue.cancel_tasks()
+
+    async def _refill(self, session: AsyncSession, queue: _ViewerQueue) -> None:
+        """Догрузить в буфер следующую пачку кандидатов."""
+        rows = await MatchingService.get_candidates(
+            session,
+            queue.viewer,
+            limit=self.batch_size,
+            exclude_ids=queue.excluded_ids(),
+            after=queue.cursor
+        )
+        wrapped = queue.cursor is None
+        if len(rows) < self.batch_size and not wrapped:
+            # Курсор дошёл до конца ленты — продолжаем сверху
+            seen = {pid for pid, _ in rows}
+            top = await MatchingService.get_candidates(
+                session,
+                queue.viewer,
+                limit=self.batch_size,
+                exclude_ids=queue.excluded_ids() | seen
+            )
+            rows.extend(top)
+            wrapped = True
+            short = len(top) < self.batch_size
+        else:
+            short = len(rows) < self.batch_size
+
+        known = queue.excluded_ids()
+        fresh = [pid for pid, _ in rows if pid not in known]
+        if Config.FEED_RANKING_ENABLED:
+            # Курсор идёт по last_active, а внутри пачки порядок задаёт оценка
+            fresh = await rank_candidates(
+                session, queue.viewer.id, queue.viewer.age, fresh
+            )
+        queue.ids.extend(fresh)
+        if rows:
+            pid, last_active = rows[-1]
+            queue.cursor = (last_active, pid)
+        # Неполная пачка от самого верха ленты — непросмотренных больше нет
+        queue.exhausted = wrapped and short
+
+    async def _background_refill(self, queue: _ViewerQueue) -> None:
+        """Дозагрузка в отдельной сессии, пока зритель смотрит анкеты."""
+        try:
+            async with async_session_maker() as session:
+                await self._refill(session, queue)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Не удалось дозагрузить ленту для {queue.viewer.id}: {e}")
+        finally:
+            queue.refill_task = None
+
+    def _schedule_refill(self, queue: _ViewerQueue) -> None:
+        """Запустить фоновую дозагрузку, если она ещё не идёт."""
+        if queue.refill_task is None and not queue.exhausted:
+            queue.refill_task = asyncio.create_task(self._background_refill(queue))
+
+    async def _take(self, session: AsyncSession, queue: _ViewerQueue) -> Optional[User]:
+        """Достать из буфера следующую анкету, которая всё ещё подходит."""
+        while True:
+            if not queue.ids and queue.refill_task is not None:
+                # Пачка уже догружается — дожидаемся её, а не дублируем запрос
+                await asyncio.wait({queue.refill_task})
+
+            if not queue.ids:
+                await self._refill(session, queue)
+                if not queue.ids:
+                    return None
+
+            profile_id = queue.ids.popleft()
+            queue.ahead_id = profile_id
+            profile = await MatchingService.get_profile_if_eligible(
+                session, queue.viewer, profile_id
+            )
+            if profile is not None:
+                return profile
+            # Анкету успели скрыть или забанить — берём следующую
+            queue.rejected.add(profile_id)
+
+    async def _accept_prepared(
+        self,
+        session: AsyncSession,
+        queue: _ViewerQueue,
+        profile: User
+    ) -> Optional[User]:
+        """Перепроверить анкету от look-ahead и перенести её в сессию зрителя."""
+        if profile.telegram_id in ban_list:
+            return None
+        if not await MatchingService.is_still_eligible(session, queue.viewer, profile.id):
+            return None
+        # Анкета загружена в закрытой сессии look-ahead; merge без SELECT
+        # привязывает её (вместе с вузом) к сессии обработчика
+        return await session.merge(profile, load=False)
+
+    async def _look_ahead(self, queue: _ViewerQueue) -> Optional[User]:
+        """Подготовить следующую анкету в отдельной сессии."""
+        try:
+            async with async_session_maker() as session:
+                return await self._take(session, queue)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Не удалось подготовить анкету для {queue.viewer.id}: {e}")
+            return None
+
+    async def _resume_current(
+        self,
+        session: AsyncSession,
+        queue: _ViewerQueue
+    ) -> Optional[User]:
+        """Анкета на экране, если зритель ушёл из ленты, не ответив на неё."""
+        if queue.current_id is None:
+            return None
+        profile = await MatchingService.get_profile_if_eligible(
+            session, queue.viewer, queue.current_id
+        )
+        if profile is None or await MatchingService.is_viewed(session, queue.viewer.id, profile.id):
+            return None
+        return profile
+
+    async def next_profile(
+        self,
+        session: AsyncSession,
+        viewer: FeedViewer,
+        cursor: Optional[FeedCursor] = None,
+        resume: bool = False
+    ) -> Optional[User]:
+        """Выдать следующую анкету из буфера зрителя.
+
+        cursor используется, только если буфера зрителя ещё нет в памяти
+        (после перезапуска или вытеснения): лента продолжится с него.
+
+        resume — вход в ленту без свайпа (из меню, «Продолжить»). Просмотренной
+        анкета становится только после действия, поэтому показанная, но
+        оставленная без ответа анкета выдаётся снова, а подготовленная
+        look-ahead'ом остаётся ждать следующего свайпа.
+
+        Анкета, подготовленная look-ahead'ом, уже загружена вместе с вузом;
+        перед выдачей остаётся только короткая перепроверка.
+        """
+        queue = self._get_queue(viewer, cursor)
+
+        if resume:
+            profile = await self._resume_current(session, queue)
+            if profile is not None:
+                return profile
+
+        profile = None
+        if queue.lookahead_task is not None:
+            task, queue.lookahead_task = queue.lookahead_task, None
+            profile = await task
+            if profile is not None:
+                prepared_id = profile.id
+                profile = await self._accept_prepared(session, queue, profile)
+                if profile is None:
+                    queue.rejected.add(prepared_id)
+        if profile is None:
+            profile = await self._take(session, queue)
+
+        queue.ahead_id = None
+        if profile is None:
+            queue.current_id = None
+            return None
+
+        queue.current_id = profile.id
+        if len(queue.ids) < self.low_water:
+            self._schedule_refill(queue)
+        if Config.FEED_LOOKAHEAD_ENABLED:
+            queue.lookahead_task = asyncio.create_task(self._look_ahead(queue))
+        return profile
+
+
+candidate_queue = CandidateQueue(
+    batch_size=Config.FEED_BATCH_SIZE,
+    low_water=Config.FEED_LOW_WATER_MARK,
+    max_viewers=Config.FEED_QUEUE_MAX_VIEWERS,
+)
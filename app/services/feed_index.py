@@ -0,0 +1,196 @@
+"""In-memory индекс анкет, доступных в ленте."""
+import heapq
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Container, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import User
+
+logger = logging.getLogger(__name__)
+
+# (university_id, gender, looking_for)
+BucketKey = Tuple[int, str, str]
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _sort_key(last_active: datetime) -> int:
+    """Ключ сортировки: по возрастанию ключа идут самые активные."""
+    return -((last_active - _EPOCH) // _MICROSECOND)
+
+
+def _from_sort_key(key: int) -> datetime:
+    """Восстановить last_active из ключа сортировки."""
+    return _EPOCH - key * _MICROSECOND
+
+
+def is_feed_eligible(user: User) -> bool:
+    """Может ли анкета показываться в ленте (без учёта зрителя)."""
+    return bool(
+        user.is_active
+        and not user.is_banned
+        and user.is_registered
+        and user.show_in_search
+    )
+
+
+class _Bucket:
+    """Отсортированные по last_active DESC анкеты одной корзины."""
+
+    __slots__ = ("keys", "ids")
+
+    def __init__(self) -> None:
+        self.keys = array("q")
+        self.ids = array("q")
+
+    def insert(self, key: int, user_id: int) -> None:
+        # При равном last_active анкеты идут по убыванию id, как в запросе ленты
+        pos = bisect_left(self.keys, key)
+        end = bisect_right(self.keys, key, lo=pos)
+        while pos < end and self.ids[pos] > user_id:
+            pos += 1
+        self.keys.insert(pos, key)
+        self.ids.insert(pos, user_id)
+
+    def remove(self, key: int, user_id: int) -> None:
+        pos = bisect_left(self.keys, key)
+        while pos < len(self.keys) and self.keys[pos] == key:
+            if self.ids[pos] == user_id:
+                del self.keys[pos]
+                del self.ids[pos]
+                return
+            pos += 1
+
+    def iter_after(self, cursor: Optional[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        """Анкеты строго после курсора (ключ, id) в порядке ленты."""
+        start = 0
+        if cursor is not None:
+            cursor_key, cursor_id = cursor
+            start = bisect_left(self.keys, cursor_key)
+        for pos in range(start, len(self.keys)):
+            key, user_id = self.keys[pos], self.ids[pos]
+            if cursor is not None and key == cursor_key and user_id >= cursor_id:
+                continue
+            yield key, user_id
+
+
+class FeedIndex:
+    """Индекс подходящих для ленты анкет по вузу и полу.
+
+    Анкеты разложены по корзинам (university_id, gender, looking_for);
+    внутри корзины ID лежат компактными массивами, отсортированными
+    по last_active. Индекс обновляется точечно при регистрации,
+    редактировании, заморозке, бане и скрытии анкеты, поэтому подбор
+    кандидатов для ленты не требует запроса к users.
+    """
+
+    def __init__(self) -> None:
+        self.loaded = False
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._entries: Dict[int, Tuple[BucketKey, int]] = {}
+
+    async def load(self, session: AsyncSession) -> None:
+        """Построить индекс по текущему состоянию таблицы users."""
+        stmt = select(
+            User.id, User.university_id, User.gender, User.looking_for, User.last_active
+        ).where(
+            User.is_active == True,
+            User.is_banned == False,
+            User.is_registered == True,
+            User.show_in_search == True,
+        )
+        result = await session.execute(stmt)
+
+        rows: Dict[BucketKey, List[Tuple[int, int]]] = {}
+        entries: Dict[int, Tuple[BucketKey, int]] = {}
+        for user_id, university_id, gender, looking_for, last_active in result:
+            bucket_key = (university_id, gender, looking_for)
+            key = _sort_key(last_active)
+            rows.setdefault(bucket_key, []).append((key, user_id))
+            entries[user_id] = (bucket_key, key)
+
+        buckets: Dict[BucketKey, _Bucket] = {}
+        for bucket_key, items in rows.items():
+            items.sort(key=lambda item: (item[0], -item[1]))
+            bucket = _Bucket()
+            bucket.keys.extend(key for key, _ in items)
+            bucket.ids.extend(user_id for _, user_id in items)
+            buckets[bucket_key] = bucket
+
+        self._buckets = buckets
+        self._entries = entries
+        self.loaded = True
+        logger.info(f"Индекс ленты построен: {len(entries)} анкет, {len(buckets)} корзин")
+
+    def _insert(self, user_id: int, bucket_key: BucketKey, key: int) -> None:
+        self._buckets.setdefault(bucket_key, _Bucket()).insert(key, user_id)
+        self._entries[user_id] = (bucket_key, key)
+
+    def remove(self, user_id: int) -> None:
+        """Убрать анкету из индекса."""
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        bucket_key, key = entry
+        bucket = self._buckets.get(bucket_key)
+        if bucket is not None:
+            bucket.remove(key, user_id)
+
+    def sync_user(self, user: Optional[User]) -> None:
+        """Привести запись индекса в соответствие с актуальной анкетой."""
+        if not self.loaded or user is None:
+            return
+        self.remove(user.id)
+        if is_feed_eligible(user):
+            self._insert(
+                user.id,
+                (user.university_id, user.gender, user.looking_for),
+                _sort_key(user.last_active)
+            )
+
+    def touch(self, user_id: int, last_active: datetime) -> None:
+        """Передвинуть анкету после обновления last_active."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        bucket_key, _ = entry
+        self.remove(user_id)
+        self._insert(user_id, bucket_key, _sort_key(last_active))
+
+    def candidates(
+        self,
+        viewer,
+        limit: int,
+        exclude_ids: Container[int] = (),
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Tuple[int, datetime]]:
+        """Подобрать (id, last_active) анкет для зрителя в порядке ленты.
+
+        after — курсор (last_active, id): берутся анкеты строго после него.
+        """
+        cursor = (_sort_key(after[0]), after[1]) if after is not None else None
+        genders = ["male", "female"] if viewer.looking_for == "any" else [viewer.looking_for]
+        streams = []
+        for gender in genders:
+            for looking_for in ("any", viewer.gender):
+                bucket = self._buckets.get((viewer.university_id, gender, looking_for))
+                if bucket is not None and len(bucket.ids):
+                    streams.append(bucket.iter_after(cursor))
+
+        result: List[Tuple[int, datetime]] = []
+        for key, user_id in heapq.merge(*streams, key=lambda item: (item[0], -item[1])):
+            if user_id == viewer.id or user_id in exclude_ids:
+                continue
+            result.append((user_id, _from_sort_key(key)))
+            if len(result) >= limit:
+                break
+        return result
+
+
+feed_index = FeedIndex()
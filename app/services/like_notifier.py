@@ -0,0 +1,140 @@
+"""Склейка уведомлений о новых лайках."""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.models import PendingLikeNotification, User
+
+logger = logging.getLogger(__name__)
+
+# Ошибки, после которых уведомление стоит повторить
+_TRANSIENT_ERRORS = (TelegramNetworkError, TelegramRetryAfter, TelegramServerError)
+
+
+class LikeNotifier:
+    """Отложенные уведомления «У тебя N лайков».
+
+    Лайк не шлёт сообщение сразу, а ставит получателю отметку в
+    pending_like_notifications. Каждый следующий лайк отодвигает отправку
+    на quiet_window, но не дальше max_delay от первого лайка. Когда срок
+    подошёл, уходит одно сообщение с актуальным числом лайков.
+
+    Отметки лежат в БД, поэтому после перезапуска бота накопленные
+    уведомления отправятся. Перед отправкой отметки удаляются отдельной
+    короткой транзакцией, а при временной ошибке Telegram ставятся снова.
+    """
+
+    def __init__(
+        self,
+        quiet_window: float,
+        max_delay: float,
+        poll_interval: float,
+        batch_size: int = 100
+    ) -> None:
+        self.quiet_window = timedelta(seconds=quiet_window)
+        self.max_delay = timedelta(seconds=max_delay)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def schedule(self, user_id: int) -> None:
+        """Отметить, что у пользователя новый лайк."""
+        now = datetime.utcnow()
+        stmt = insert(PendingLikeNotification).values(
+            user_id=user_id,
+            first_at=now,
+            due_at=now + self.quiet_window
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PendingLikeNotification.user_id],
+            set_={
+                "due_at": func.least(
+                    PendingLikeNotification.first_at + self.max_delay,
+                    now + self.quiet_window
+                )
+            }
+        )
+        # Отдельная сессия: отметка не должна зависеть от транзакции обработчика
+        async with async_session_maker() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    async def send_due(self, bot: Bot) -> int:
+        """Отправить уведомления, у которых подошёл срок. Возвращает их число.
+
+        Отметки забираются DELETE ... RETURNING и коммитятся до отправки,
+        поэтому блокировки строк не держатся, пока идут запросы к Telegram.
+        """
+        from app.services.notification_service import NotificationService
+
+        async with async_session_maker() as session:
+            due = (
+                select(PendingLikeNotification.user_id)
+                .where(PendingLikeNotification.due_at <= datetime.utcnow())
+                .order_by(PendingLikeNotification.due_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            claimed = delete(PendingLikeNotification).where(
+                PendingLikeNotification.user_id.in_(due.scalar_subquery())
+            ).returning(PendingLikeNotification.user_id).cte("claimed")
+            stmt = select(User).join(claimed, claimed.c.user_id == User.id)
+            users = list((await session.scalars(stmt)).all())
+            await session.commit()
+
+        for user in users:
+            try:
+                await NotificationService.send_like_count(bot, user)
+            except _TRANSIENT_ERRORS as e:
+                logger.warning(f"Не удалось уведомить {user.id} о лайках, повторим: {e}")
+                await self.schedule(user.id)
+            except Exception as e:
+                # Заблокированный бот и т. п. — повтор не поможет
+                logger.warning(f"Не удалось уведомить {user.id} о лайках: {e}")
+        return len(users)
+
+    async def _run(self, bot: Bot) -> None:
+        """Проверять отложенные уведомления по таймеру."""
+        while True:
+            try:
+                while await self.send_due(bot) == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Ошибка при отправке уведомлений о лайках: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self, bot: Bot) -> None:
+        """Запустить фоновую отправку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self) -> None:
+        """Остановить фоновую отправку (неотправленное останется в БД)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+like_notifier = LikeNotifier(
+    quiet_window=Config.LIKE_NOTIFY_QUIET_SECONDS,
+    max_delay=Config.LIKE_NOTIFY_MAX_DELAY_SECONDS,
+    poll_interval=Config.LIKE_NOTIFY_POLL_SECONDS,
+)
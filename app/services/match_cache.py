@@ -0,0 +1,51 @@
+"""Кэш существования мэтчей."""
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import Config
+
+
+class MatchPairCache:
+    """LRU-кэш пар, у которых точно есть активный мэтч.
+
+    Пара хранится упорядоченной (как user1_id, user2_id в matches), так что
+    проверка — один поиск в словаре. Кэшируются только положительные
+    ответы и только после commit (см. database/on_commit.py): мэтч не
+    деактивируется, поэтому закоммиченная пара остаётся верной, а «мэтча
+    нет» мог бы устареть после вставки из любого пути записи.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._cache: "OrderedDict[Tuple[int, int], bool]" = OrderedDict()
+
+    @staticmethod
+    def _key(user1_id: int, user2_id: int) -> Tuple[int, int]:
+        first_id, second_id = sorted([user1_id, user2_id])
+        return first_id, second_id
+
+    def get(self, user1_id: int, user2_id: int) -> Optional[bool]:
+        """True, если мэтч пары известен (None — надо спросить БД)."""
+        key = self._key(user1_id, user2_id)
+        exists = self._cache.get(key)
+        if exists is not None:
+            self._cache.move_to_end(key)
+        return exists
+
+    def remember(self, user1_id: int, user2_id: int) -> None:
+        """Запомнить закоммиченный активный мэтч пары."""
+        key = self._key(user1_id, user2_id)
+        self._cache[key] = True
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def forget(self, user1_id: int, user2_id: int) -> None:
+        """Сбросить пару: следующий вопрос уйдёт в БД."""
+        self._cache.pop(self._key(user1_id, user2_id), None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+match_cache = MatchPairCache(max_size=Config.MATCH_CACHE_SIZE)
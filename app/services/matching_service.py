@@ -1,10 +1,35 @@
 """Сервис для подбора анкет."""
-from typing import Optional, List
-from sqlalchemy import select, or_, and_
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional, List, Tuple
+from sqlalchemy import Select, delete, exists, literal, select, or_, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import Config
 from app.database.models import User, ViewedProfile
+from app.services.feed_index import feed_index
+from app.services.seen_set import seen_set_store
+from app.services.swipe_buffer import swipe_buffer
+
+
+# Позиция в ленте: (last_active, id) последней выданной анкеты
+FeedCursor = Tuple[datetime, int]
+
+
+class FeedViewer(NamedTuple):
+    """Снимок полей зрителя, от которых зависит его лента."""
+    id: int
+    university_id: int
+    gender: str
+    looking_for: str
+    # Нужен только ранжированию (близость по возрасту)
+    age: Optional[int] = None
+    
+    @classmethod
+    def of(cls, user: User) -> "FeedViewer":
+        """Снять поля ленты с модели пользователя."""
+        return cls(user.id, user.university_id, user.gender, user.looking_for, user.age)
 
 
 class MatchingService:
@@ -16,31 +41,56 @@ class MatchingService:
         user_id: int
     ) -> List[int]:
         """Получить ID просмотренных анкет."""
+        if Config.SEEN_SET_BACKEND == "compact":
+            return list(await seen_set_store.get(session, user_id))
+        
         stmt = select(ViewedProfile.viewed_id).where(
             ViewedProfile.viewer_id == user_id
         )
+        since = MatchingService.views_since()
+        if since is not None:
+            stmt = stmt.where(ViewedProfile.created_at >= since)
         result = await session.execute(stmt)
         return list(result.scalars().all())
     
     @staticmethod
-    async def get_next_profile(
-        session: AsyncSession,
-        user: User
-    ) -> Optional[User]:
-        """Получить следующую анкету для просмотра."""
-        # Получить ID уже просмотренных
-        viewed_ids = await MatchingService.get_viewed_profile_ids(session, user.id)
+    def views_since() -> Optional[datetime]:
+        """С какого момента просмотр исключает анкету из ленты.
         
+        None — без ограничения. Иначе более старые просмотры не учитываются,
+        и условие по created_at отсекает лишние партиции viewed_profiles.
+        """
+        if Config.FEED_SHOW_AGAIN_DAYS <= 0:
+            return None
+        return datetime.utcnow() - timedelta(days=Config.FEED_SHOW_AGAIN_DAYS)
+    
+    @staticmethod
+    def seen_condition(viewer_id, viewed_id):
+        """Условие «зритель уже видел анкету» для строк viewed_profiles.
+        
+        viewed_id может быть числом или столбцом (для anti-join ленты).
+        """
+        viewed = [
+            ViewedProfile.viewer_id == viewer_id,
+            ViewedProfile.viewed_id == viewed_id
+        ]
+        since = MatchingService.views_since()
+        if since is not None:
+            viewed.append(ViewedProfile.created_at >= since)
+        return exists().where(*viewed)
+    
+    @staticmethod
+    def feed_conditions(viewer: FeedViewer) -> list:
+        """Условия отбора анкет для ленты зрителя."""
         # Определить искомый пол
-        if user.looking_for == "any":
+        if viewer.looking_for == "any":
             gender_filter = ["male", "female"]
         else:
-            gender_filter = [user.looking_for]
+            gender_filter = [viewer.looking_for]
         
-        # Запрос
-        conditions = [
-            User.university_id == user.university_id,  # Тот же университет
-            User.id != user.id,  # Не сам себе
+        return [
+            User.university_id == viewer.university_id,  # Тот же университет
+            User.id != viewer.id,  # Не сам себе
             User.is_active == True,
             User.is_banned == False,
             User.is_registered == True,
@@ -49,69 +99,246 @@ class MatchingService:
             # Взаимный интерес по полу
             or_(
                 User.looking_for == "any",
-                User.looking_for == user.gender
+                User.looking_for == viewer.gender
             )
         ]
+    
+    @staticmethod
+    async def get_candidates(
+        session: AsyncSession,
+        viewer: FeedViewer,
+        limit: int,
+        exclude_ids: Iterable[int] = (),
+        exclusion: Optional[str] = None,
+        after: Optional[FeedCursor] = None
+    ) -> List[Tuple[int, datetime]]:
+        """Подобрать пачку (id, last_active) непросмотренных анкет одним запросом.
         
-        if viewed_ids:
-            conditions.append(User.id.not_in(viewed_ids))
+        after — курсор (last_active, id) последней выданной анкеты: пачка
+        начинается строго после него, поэтому запрос не перебирает заново
+        уже пройденную часть ленты.
         
-        query = select(User).where(
+        Если индекс ленты загружен, кандидаты берутся из него. Иначе в режиме
+        "not_exists" просмотренные отсекаются anti-join'ом по viewed_profiles
+        прямо в БД, в режиме "not_in" — списком ID, загруженным в Python.
+        """
+        excluded = set(exclude_ids)
+        # Свайпы, которые ещё не записаны в viewed_profiles
+        excluded.update(swipe_buffer.pending_views(viewer.id))
+        
+        if feed_index.loaded:
+            # Кандидаты уже разложены по корзинам в памяти — из БД нужен
+            # только список просмотренных (в режиме table — весь, при каждой
+            # дозагрузке; compact берёт его из кэша, см. Config.FEED_INDEX_ENABLED)
+            viewed_ids = await MatchingService.get_viewed_profile_ids(session, viewer.id)
+            excluded.update(viewed_ids)
+            return feed_index.candidates(viewer, limit, excluded, after=after)
+        
+        exclusion = exclusion or Config.FEED_EXCLUSION_MODE
+        if Config.SEEN_SET_BACKEND == "compact":
+            # Просмотренные лежат не строками, anti-join по таблице невозможен
+            exclusion = "not_in"
+        
+        if exclusion == "not_in":
+            # Получить ID уже просмотренных
+            viewed_ids = await MatchingService.get_viewed_profile_ids(session, viewer.id)
+            excluded.update(viewed_ids)
+        
+        query = MatchingService.candidate_query(
+            viewer,
+            limit,
+            excluded,
+            anti_join=exclusion != "not_in",
+            after=after
+        )
+        result = await session.execute(query)
+        return [(row.id, row.last_active) for row in result]
+    
+    @staticmethod
+    def candidate_query(
+        viewer: FeedViewer,
+        limit: int,
+        exclude_ids: Iterable[int] = (),
+        anti_join: bool = True,
+        after: Optional[FeedCursor] = None
+    ) -> Select:
+        """Запрос пачки кандидатов для ленты.
+        
+        Рассчитан на частичный индекс ix_users_feed
+        (university_id, gender, last_active DESC).
+        """
+        conditions = MatchingService.feed_conditions(viewer)
+        
+        if anti_join:
+            conditions.append(~MatchingService.seen_condition(viewer.id, User.id))
+        
+        exclude_ids = set(exclude_ids)
+        if exclude_ids:
+            conditions.append(User.id.not_in(exclude_ids))
+        
+        if after is not None:
+            # Keyset: строго после (last_active, id) последней анкеты
+            conditions.append(tuple_(User.last_active, User.id) < tuple_(*after))
+        
+        return select(User.id, User.last_active).where(
             *conditions
-        ).options(
-            selectinload(User.university)
         ).order_by(
-            User.last_active.desc()  # Сначала активные
-        ).limit(1)
+            User.last_active.desc(),  # Сначала активные
+            User.id.desc()
+        ).limit(limit)
+    
+    @staticmethod
+    async def get_profile_if_eligible(
+        session: AsyncSession,
+        viewer: FeedViewer,
+        profile_id: int
+    ) -> Optional[User]:
+        """Загрузить анкету из буфера, если она всё ещё подходит для ленты.
         
+        Между подбором пачки и показом анкету могли скрыть, заморозить
+        или забанить, поэтому условия ленты проверяются повторно.
+        """
+        query = select(User).where(
+            User.id == profile_id,
+            *MatchingService.feed_conditions(viewer)
+        ).options(
+            selectinload(User.university)
+        )
         result = await session.execute(query)
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def is_still_eligible(
+        session: AsyncSession,
+        viewer: FeedViewer,
+        profile_id: int
+    ) -> bool:
+        """Проверить анкету по условиям ленты, не загружая её.
+        
+        Поиск одной строки по первичному ключу — для анкет, которые уже
+        загружены заранее (см. candidate_queue look-ahead).
+        """
+        query = select(User.id).where(
+            User.id == profile_id,
+            *MatchingService.feed_conditions(viewer)
+        )
+        return await session.scalar(query) is not None
+    
+    @staticmethod
+    async def is_viewed(
+        session: AsyncSession,
+        viewer_id: int,
+        profile_id: int
+    ) -> bool:
+        """Отмечена ли анкета просмотренной (в БД или в буфере свайпов)."""
+        if profile_id in swipe_buffer.pending_views(viewer_id):
+            return True
+        if Config.SEEN_SET_BACKEND == "compact":
+            return profile_id in await seen_set_store.get(session, viewer_id)
+        return bool(await session.scalar(
+            select(MatchingService.seen_condition(viewer_id, profile_id))
+        ))
+    
+    @staticmethod
+    async def get_next_profile(
+        session: AsyncSession,
+        user: User,
+        cursor: Optional[FeedCursor] = None,
+        resume: bool = False
+    ) -> Optional[User]:
+        """Получить следующую анкету для просмотра.
+        
+        Анкеты берутся из буфера кандидатов зрителя (см. candidate_queue),
+        который пополняется пачками по Config.FEED_BATCH_SIZE. cursor —
+        позиция последней показанной анкеты из FSM: с неё продолжается
+        лента, если буфера зрителя ещё нет в памяти. resume — вход в ленту
+        без свайпа: анкета, оставшаяся без ответа, показывается снова.
+        """
+        from app.services.candidate_queue import candidate_queue
+        return await candidate_queue.next_profile(
+            session, FeedViewer.of(user), cursor, resume=resume
+        )
+    
+    @staticmethod
+    def dump_cursor(profile: User) -> List:
+        """Курсор ленты для хранения в FSM (JSON-совместимый)."""
+        return [profile.last_active.isoformat(), profile.id]
+    
+    @staticmethod
+    def load_cursor(data: Optional[List]) -> Optional[FeedCursor]:
+        """Восстановить курсор ленты из данных FSM."""
+        if not data:
+            return None
+        last_active, profile_id = data
+        return datetime.fromisoformat(last_active), int(profile_id)
+    
     @staticmethod
     async def mark_as_viewed(
         session: AsyncSession,
         viewer_id: int,
         viewed_id: int
     ) -> None:
-        """Пометить анкету как просмотренную."""
-        viewed = ViewedProfile(
-            viewer_id=viewer_id,
-            viewed_id=viewed_id
-        )
-        session.add(viewed)
-        await session.flush()
+        """Пометить анкету как просмотренную.
+        
+        Если просмотр ещё исключает анкету из ленты, второй не пишется.
+        """
+        if Config.SEEN_SET_BACKEND == "compact":
+            await seen_set_store.add(session, viewer_id, viewed_id)
+            return
+        
+        stmt = insert(ViewedProfile).from_select(
+            ["viewer_id", "viewed_id", "created_at"],
+            select(
+                literal(viewer_id),
+                literal(viewed_id),
+                literal(datetime.utcnow())
+            ).where(~MatchingService.seen_condition(viewer_id, viewed_id))
+        ).on_conflict_do_nothing(index_elements=["viewer_id", "viewed_id", "created_at"])
+        await session.execute(stmt)
     
     @staticmethod
     async def reset_views(
         session: AsyncSession,
         user_id: int
-    ) -> None:
-        """Сбросить просмотренные анкеты."""
-        stmt = select(ViewedProfile).where(ViewedProfile.viewer_id == user_id)
-        result = await session.execute(stmt)
-        viewed_profiles = result.scalars().all()
+    ) -> int:
+        """Сбросить просмотренные анкеты.
         
-        for viewed in viewed_profiles:
-            await session.delete(viewed)
+        Один DELETE независимо от числа просмотров. Возвращает число
+        удалённых отметок.
+        """
+        from app.services.candidate_queue import candidate_queue
+        candidate_queue.invalidate(user_id)
+        # Отложенные просмотры сброс всё равно стёр бы — не даём им записаться после него
+        await swipe_buffer.discard_views(user_id)
         
+        if Config.SEEN_SET_BACKEND == "compact":
+            return await seen_set_store.reset(session, user_id)
+        
+        stmt = delete(ViewedProfile).where(ViewedProfile.viewer_id == user_id)
+        result = await session.execute(stmt)
         await session.flush()
+        return result.rowcount
 
     @staticmethod
     async def reset_views_between_users(
         session: AsyncSession,
         user1_id: int,
         user2_id: int
-    ) -> None:
-        """Удалить пометки просмотра анкет между двумя пользователями (в обе стороны)."""
-        stmt = select(ViewedProfile).where(
+    ) -> int:
+        """Удалить пометки просмотра анкет между двумя пользователями (в обе стороны).
+        
+        Возвращает число удалённых отметок.
+        """
+        await swipe_buffer.discard_between(user1_id, user2_id, dislikes=False)
+        if Config.SEEN_SET_BACKEND == "compact":
+            return await seen_set_store.discard_between(session, user1_id, user2_id)
+        
+        stmt = delete(ViewedProfile).where(
             or_(
                 and_(ViewedProfile.viewer_id == user1_id, ViewedProfile.viewed_id == user2_id),
                 and_(ViewedProfile.viewer_id == user2_id, ViewedProfile.viewed_id == user1_id),
             )
         )
         result = await session.execute(stmt)
-        viewed_profiles = result.scalars().all()
-        for vp in viewed_profiles:
-            await session.delete(vp)
         await session.flush()
-
+        return result.rowcount
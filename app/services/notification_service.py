@@ -1,18 +1,67 @@
 """Сервис для отправки уведомлений."""
-from typing import Optional
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional, Set
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.middlewares.outbound_middleware import background_sends
 from app.database.models import User, Match
 from app.database.repositories.match_repo import MatchRepository
 from app.utils.helpers import send_profile
 from app.keyboards.inline import match_kb
 from app.utils.text_templates import TEXTS
 
+logger = logging.getLogger(__name__)
+
+# Ссылки на фоновые уведомления, чтобы задачи не собрал сборщик мусора
+_pending_notifications: Set[asyncio.Task] = set()
+
+
+def _notify_in_background(notify: Callable[[AsyncSession], Awaitable[None]]) -> None:
+    """Запустить уведомление отдельной задачей со своей сессией.
+
+    Сессия обработчика закрывается вместе с ним, поэтому задача открывает
+    свою. Пользователи, переданные в уведомление, должны быть загружены
+    до commit (expire_on_commit=False сохраняет их поля).
+    """
+    async def run() -> None:
+        try:
+            async with async_session_maker() as session:
+                await notify(session)
+        except Exception as e:
+            logger.error(f"Ошибка отправки уведомления: {e}")
+
+    task = asyncio.create_task(run())
+    _pending_notifications.add(task)
+    task.add_done_callback(_pending_notifications.discard)
+
 
 class NotificationService:
     """Сервис для отправки уведомлений."""
     
+    @staticmethod
+    def notify_match_later(bot: Bot, user1: User, user2: User) -> None:
+        """Уведомить о мэтче в фоне, не задерживая ответ пользователю.
+        
+        Вызывать после commit.
+        """
+        _notify_in_background(
+            lambda session: NotificationService.notify_match(bot, session, user1, user2)
+        )
+    
+    @staticmethod
+    def notify_like_later(bot: Bot, user: User) -> None:
+        """Уведомить о лайке в фоне, не задерживая ответ пользователю.
+        
+        Вызывать после commit: счётчик лайков читается в новой сессии.
+        """
+        _notify_in_background(
+            lambda session: NotificationService.notify_like(bot, session, user)
+        )
+    
     @staticmethod
     async def notify_match(
         bot: Bot,
@@ -24,45 +73,47 @@ class NotificationService:
         from app.keyboards.inline import match_write_only_kb
         from app.keyboards.reply import main_menu_kb
         
-        # Уведомление первому пользователю
-        if user2.username:
+        # Уведомления уступают очередь ответам на действия пользователей
+        with background_sends():
+            # Уведомление первому пользователю
+            if user2.username:
+                await bot.send_message(
+                    chat_id=user1.telegram_id,
+                    text=TEXTS["new_match"],
+                    reply_markup=match_write_only_kb(user2.username)
+                )
+            else:
+                await bot.send_message(
+                    chat_id=user1.telegram_id,
+                    text=TEXTS["new_match"]
+                )
+            
+            # Отправляем главное меню (без удаления, так как это уведомление)
             await bot.send_message(
                 chat_id=user1.telegram_id,
-                text=TEXTS["new_match"],
-                reply_markup=match_write_only_kb(user2.username)
-            )
-        else:
-            await bot.send_message(
-                chat_id=user1.telegram_id,
-                text=TEXTS["new_match"]
-            )
-        
-        # Отправляем главное меню (без удаления, так как это уведомление)
-        await bot.send_message(
-            chat_id=user1.telegram_id,
-            text=TEXTS["main_menu"],
-            reply_markup=main_menu_kb(user1.show_in_search)
-        )
-        
-        # Уведомление второму пользователю
-        if user1.username:
-            await bot.send_message(
-                chat_id=user2.telegram_id,
-                text=TEXTS["new_match"],
-                reply_markup=match_write_only_kb(user1.username)
+                text=TEXTS["main_menu"],
+                reply_markup=main_menu_kb(user1.show_in_search)
             )
-        else:
+            
+            # Уведомление второму пользователю
+            if user1.username:
+                await bot.send_message(
+                    chat_id=user2.telegram_id,
+                    text=TEXTS["new_match"],
+                    reply_markup=match_write_only_kb(user1.username)
+                )
+            else:
+                await bot.send_message(
+                    chat_id=user2.telegram_id,
+                    text=TEXTS["new_match"]
+                )
+            
+            # Отправляем главное меню (без удаления, так как это уведомление)
             await bot.send_message(
                 chat_id=user2.telegram_id,
-                text=TEXTS["new_match"]
+                text=TEXTS["main_menu"],
+                reply_markup=main_menu_kb(user2.show_in_search)
             )
-        
-        # Отправляем главное меню (без удаления, так как это уведомление)
-        await bot.send_message(
-            chat_id=user2.telegram_id,
-            text=TEXTS["main_menu"],
-            reply_markup=main_menu_kb(user2.show_in_search)
-        )
     
     @staticmethod
     async def notify_like(
@@ -70,17 +121,40 @@ class NotificationService:
         session: AsyncSession,
         user: User
     ) -> None:
-        """Отправить уведомление о новом лайке с количеством."""
+        """Отправить уведомление о новом лайке с количеством.
+        
+        Если включена склейка (LIKE_NOTIFY_QUIET_SECONDS > 0), сообщение
+        откладывается: серия лайков даст одно уведомление (см. like_notifier).
+        """
         from app.database.repositories.like_repo import LikeRepository
-        from app.keyboards.reply import yes_no_kb
+        from app.services.like_notifier import like_notifier
         
         # Не отправляем уведомления фейковым пользователям и тем, у кого нет валидного чата
         if getattr(user, "is_fake", False) or not user.telegram_id or user.telegram_id <= 0:
             return
         
+        if Config.LIKE_NOTIFY_QUIET_SECONDS > 0:
+            await like_notifier.schedule(user.id)
+            return
+        
         # Получаем количество входящих лайков
-        incoming_likes = await LikeRepository.get_incoming_likes(session, user.id)
-        likes_count = len(incoming_likes)
+        likes_count = await LikeRepository.count_incoming_likes(session, user.id)
+        await NotificationService.send_like_count(bot, user, likes_count)
+    
+    @staticmethod
+    async def send_like_count(
+        bot: Bot,
+        user: User,
+        likes_count: Optional[int] = None
+    ) -> None:
+        """Отправить сообщение с числом входящих лайков.
+        
+        Без likes_count берётся user.incoming_likes_count.
+        """
+        from app.keyboards.reply import yes_no_kb
+        
+        if likes_count is None:
+            likes_count = user.incoming_likes_count
         
         if likes_count == 0:
             return
@@ -92,11 +166,12 @@ class NotificationService:
             text = f"💌 У тебя {likes_count} лайк(ов)!\nПоказать?"
         
         # Отправляем новое уведомление
-        await bot.send_message(
-            chat_id=user.telegram_id,
-            text=text,
-            reply_markup=yes_no_kb()
-        )
+        with background_sends():
+            await bot.send_message(
+                chat_id=user.telegram_id,
+                text=text,
+                reply_markup=yes_no_kb()
+            )
     
     @staticmethod
     async def notify_ban(
@@ -104,8 +179,9 @@ class NotificationService:
         user: User
     ) -> None:
         """Отправить уведомление о бане."""
-        await bot.send_message(
-            chat_id=user.telegram_id,
-            text=TEXTS["banned"]
-        )
+        with background_sends():
+            await bot.send_message(
+                chat_id=user.telegram_id,
+                text=TEXTS["banned"]
+            )
 
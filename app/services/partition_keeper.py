@@ -0,0 +1,69 @@
+"""Периодическое создание партиций viewed_profiles в процессе бота."""
+import asyncio
+import logging
+from typing import Optional
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.partitions import ensure_partitions, is_partitioned
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionKeeper:
+    """Держит наперёд партиции viewed_profiles.
+
+    DEFAULT-партиции нет: строка за месяц без партиции не вставится. Поэтому
+    при старте и затем раз в refresh_interval создаются партиции на текущий и
+    VIEWED_PARTITIONS_AHEAD следующих месяцев — бот, работающий без перезапуска
+    дольше этого запаса, не упирается в отсутствующую партицию, даже если
+    maintenance.py viewed-partitions не запускается по расписанию.
+    """
+
+    def __init__(self, refresh_interval: float, ahead: int) -> None:
+        self.refresh_interval = refresh_interval
+        self.ahead = ahead
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure(self) -> bool:
+        """Создать недостающие партиции. False — таблица не партиционирована."""
+        async with async_session_maker() as session:
+            if not await is_partitioned(session):
+                return False
+            created = await ensure_partitions(session, self.ahead)
+            await session.commit()
+        if created:
+            logger.info(f"Созданы партиции viewed_profiles: {', '.join(created)}")
+        return True
+
+    async def _run(self) -> None:
+        """Проверять партиции по таймеру."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.ensure()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Не удалось создать партиции viewed_profiles: {e}")
+
+    def start(self) -> None:
+        """Запустить периодическую проверку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить периодическую проверку."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+partition_keeper = PartitionKeeper(
+    refresh_interval=Config.VIEWED_PARTITIONS_CHECK_SECONDS,
+    ahead=Config.VIEWED_PARTITIONS_AHEAD,
+)
@@ -0,0 +1,169 @@
+"""Компактное хранилище просмотренных анкет."""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Config
+from app.database.models import ViewedSet
+from app.database.on_commit import after_commit
+
+
+def encode_ids(ids: Iterable[int]) -> bytes:
+    """Упаковать ID в отсортированный delta-varint массив.
+
+    Соседние ID в одном вузе близки друг к другу, поэтому разница
+    обычно помещается в 1-2 байта вместо ~60 байт строки viewed_profiles.
+    """
+    out = bytearray()
+    prev = 0
+    for value in sorted(set(ids)):
+        delta = value - prev
+        prev = value
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_ids(data: bytes) -> List[int]:
+    """Распаковать массив, упакованный encode_ids."""
+    ids = []
+    prev = 0
+    delta = 0
+    shift = 0
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += delta
+        ids.append(prev)
+        delta = 0
+        shift = 0
+    return ids
+
+
+class SeenSetStore:
+    """Множества просмотренных анкет: одна bytea-строка на зрителя.
+
+    Множества кэшируются в памяти (LRU по зрителям) только для чтения ленты.
+    Изменение читает строку заново под FOR UPDATE, правит копию и пишет её
+    upsert'ом в текущей сессии; в кэш новое множество попадает после commit.
+    Так откат не оставляет в памяти несохранённых отметок, а буфер свайпов
+    и обработчик, пишущие одного зрителя одновременно, не затирают друг друга.
+
+    Цена — запись всего множества на каждую отметку: SELECT FOR UPDATE и
+    UPDATE строки размером ~1-2 байта на просмотренную анкету (для зрителя
+    с 5000 просмотров это ~8 КБ за свайп). Буфер свайпов пишет отметки
+    пачкой, по одному upsert'у на зрителя.
+    """
+
+    def __init__(self, max_cached: int) -> None:
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[int, Set[int]]" = OrderedDict()
+
+    def _remember(self, viewer_id: int, seen: Set[int]) -> Set[int]:
+        self._cache[viewer_id] = seen
+        self._cache.move_to_end(viewer_id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return seen
+
+    async def get(self, session: AsyncSession, viewer_id: int) -> Set[int]:
+        """Получить множество просмотренных анкет зрителя."""
+        seen = self._cache.get(viewer_id)
+        if seen is not None:
+            self._cache.move_to_end(viewer_id)
+            return seen
+
+        data = await session.scalar(
+            select(ViewedSet.data).where(ViewedSet.viewer_id == viewer_id)
+        )
+        return self._remember(viewer_id, set(decode_ids(data)) if data else set())
+
+    async def _save(self, session: AsyncSession, viewer_id: int, seen: Set[int]) -> None:
+        data = encode_ids(seen)
+        now = datetime.utcnow()
+        stmt = insert(ViewedSet).values(viewer_id=viewer_id, data=data, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ViewedSet.viewer_id],
+            set_={"data": data, "updated_at": now}
+        )
+        await session.execute(stmt)
+
+    async def _lock(self, session: AsyncSession, viewer_id: int) -> Set[int]:
+        """Прочитать множество зрителя из БД, заблокировав строку до commit."""
+        stmt = select(ViewedSet.data).where(ViewedSet.viewer_id == viewer_id).with_for_update()
+        data = await session.scalar(stmt)
+        if data is None:
+            # Пустая строка нужна, чтобы параллельная первая запись ждала нашу
+            await session.execute(
+                insert(ViewedSet)
+                .values(viewer_id=viewer_id, data=b"", updated_at=datetime.utcnow())
+                .on_conflict_do_nothing(index_elements=[ViewedSet.viewer_id])
+            )
+            data = await session.scalar(stmt)
+        return set(decode_ids(data)) if data else set()
+
+    def _publish(self, session: AsyncSession, viewer_id: int, seen: Set[int]) -> None:
+        """Положить множество в кэш после commit."""
+        after_commit(session, lambda: self._remember(viewer_id, seen))
+
+    async def add_many(
+        self,
+        session: AsyncSession,
+        pairs: Iterable[Tuple[int, int]]
+    ) -> None:
+        """Добавить пары (viewer_id, viewed_id)."""
+        by_viewer: Dict[int, Set[int]] = {}
+        for viewer_id, viewed_id in pairs:
+            by_viewer.setdefault(viewer_id, set()).add(viewed_id)
+
+        # Одинаковый порядок блокировок у всех писателей — без взаимоблокировок
+        for viewer_id in sorted(by_viewer):
+            seen = await self._lock(session, viewer_id)
+            if by_viewer[viewer_id] <= seen:
+                continue
+            seen |= by_viewer[viewer_id]
+            await self._save(session, viewer_id, seen)
+            self._publish(session, viewer_id, seen)
+        await session.flush()
+
+    async def add(self, session: AsyncSession, viewer_id: int, viewed_id: int) -> None:
+        """Пометить анкету как просмотренную."""
+        await self.add_many(session, [(viewer_id, viewed_id)])
+
+    async def reset(self, session: AsyncSession, viewer_id: int) -> int:
+        """Очистить множество зрителя. Возвращает число удалённых отметок."""
+        data = await session.scalar(
+            delete(ViewedSet).where(ViewedSet.viewer_id == viewer_id).returning(ViewedSet.data)
+        )
+        await session.flush()
+        self._publish(session, viewer_id, set())
+        return len(decode_ids(data)) if data else 0
+
+    async def discard_between(
+        self,
+        session: AsyncSession,
+        user1_id: int,
+        user2_id: int
+    ) -> int:
+        """Убрать взаимные отметки просмотра двух пользователей."""
+        removed = 0
+        for viewer_id, viewed_id in sorted([(user1_id, user2_id), (user2_id, user1_id)]):
+            seen = await self._lock(session, viewer_id)
+            if viewed_id in seen:
+                seen.discard(viewed_id)
+                await self._save(session, viewer_id, seen)
+                self._publish(session, viewer_id, seen)
+                removed += 1
+        await session.flush()
+        return removed
+
+
+seen_set_store = SeenSetStore(max_cached=Config.SEEN_SET_CACHE_SIZE)
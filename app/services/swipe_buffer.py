@@ -0,0 +1,269 @@
+"""Отложенная запись дизлайков и просмотров."""
+import asyncio
+import itertools
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.models import Like, ViewedProfile
+from app.services.seen_set import seen_set_store
+
+logger = logging.getLogger(__name__)
+
+
+class SwipeBuffer:
+    """Буфер событий свайпа, которые никто не читает сразу.
+
+    Дизлайки и отметки просмотра копятся в памяти и записываются пачкой
+    многострочными INSERT'ами раз в flush_interval секунд или как только
+    набралось max_events событий. Лайки, которые могут дать мэтч, сюда
+    не попадают и пишутся синхронно.
+
+    Пока событие не записано, лента узнаёт о нём через pending_views.
+    Перед удалением лайков или просмотров нужно вызвать discard_views или
+    discard_between: отложенные события, которые удаление всё равно стёрло
+    бы, выбрасываются, а не пишутся — иначе пачка, вернувшаяся в буфер после
+    сбоя, записалась бы уже после DELETE и вернула удалённые строки.
+
+    Пачка, которую не удалось записать, возвращается в буфер, а следующая
+    попытка откладывается всё дольше (до MAX_BACKOFF секунд). Если база
+    недоступна долго, в буфере остаются не больше max_pending событий —
+    самые старые отбрасываются.
+    """
+
+    MAX_BACKOFF = 30.0
+
+    def __init__(
+        self,
+        flush_interval: float,
+        max_events: int,
+        max_pending: Optional[int] = None,
+        session_maker=async_session_maker
+    ) -> None:
+        self.flush_interval = flush_interval
+        self.max_events = max_events
+        self.max_pending = max_pending or max_events * 20
+        self._session_maker = session_maker
+        self._dislikes: List[Dict] = []
+        # (viewer_id, viewed_id) -> время просмотра
+        self._views: Dict[Tuple[int, int], datetime] = {}
+        self._by_viewer: Dict[int, Set[int]] = {}
+        # Просмотры пачки, которая сейчас пишется в БД
+        self._flushing: Dict[int, Set[int]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._dislikes) + len(self._views)
+
+    def start(self) -> None:
+        """Запустить фоновую запись."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить фоновую запись и дописать всё, что накопилось."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def dislike(self, viewer_id: int, viewed_id: int, viewed: bool = True) -> None:
+        """Записать дизлайк и (если viewed) просмотр анкеты.
+
+        При STORE_DISLIKES=0 сам дизлайк не сохраняется, только просмотр.
+        """
+        now = datetime.utcnow()
+        if Config.STORE_DISLIKES:
+            self._dislikes.append({
+                "from_user_id": viewer_id,
+                "to_user_id": viewed_id,
+                "is_like": False,
+                "message": None,
+                "created_at": now,
+            })
+        if viewed:
+            self.view(viewer_id, viewed_id, now)
+        elif len(self) >= self.max_events:
+            self._wakeup.set()
+
+    def view(
+        self,
+        viewer_id: int,
+        viewed_id: int,
+        when: Optional[datetime] = None
+    ) -> None:
+        """Записать просмотр анкеты."""
+        self._views[(viewer_id, viewed_id)] = when or datetime.utcnow()
+        self._by_viewer.setdefault(viewer_id, set()).add(viewed_id)
+        if len(self) >= self.max_events:
+            self._wakeup.set()
+
+    def pending_views(self, viewer_id: int) -> Set[int]:
+        """Просмотры зрителя, которые ещё не записаны в БД."""
+        return set(self._by_viewer.get(viewer_id, ())) | self._flushing.get(viewer_id, set())
+
+    async def flush(self, between: Optional[Tuple[int, int]] = None) -> bool:
+        """Записать накопленные события в БД.
+
+        С between записываются только события между двумя пользователями
+        (в обе стороны); если их нет, вызов лишь дожидается пачки, которая
+        пишется прямо сейчас. Возвращает False, если запись не удалась и
+        пачка вернулась в буфер.
+        """
+        async with self._lock:
+            if between is None:
+                dislikes, self._dislikes = self._dislikes, []
+                views, self._views = self._views, {}
+                self._flushing, self._by_viewer = self._by_viewer, {}
+            else:
+                dislikes, views = self._take_between(*between)
+            if not dislikes and not views:
+                return True
+
+            try:
+                async with self._session_maker() as session:
+                    if dislikes:
+                        await session.execute(insert(Like), dislikes)
+                    if Config.SEEN_SET_BACKEND == "compact":
+                        await seen_set_store.add_many(session, views.keys())
+                    elif views:
+                        # Пачка могла частично записаться до сбоя — повтор пропускаем
+                        await session.execute(
+                            pg_insert(ViewedProfile).on_conflict_do_nothing(
+                                index_elements=["viewer_id", "viewed_id", "created_at"]
+                            ),
+                            [
+                                {"viewer_id": viewer_id, "viewed_id": viewed_id, "created_at": when}
+                                for (viewer_id, viewed_id), when in views.items()
+                            ]
+                        )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(
+                    f"Не удалось записать {len(dislikes)} дизлайков и {len(views)} просмотров, "
+                    f"повторим позже: {e}"
+                )
+                self._requeue(dislikes, views)
+                return False
+            finally:
+                self._flushing = {}
+            return True
+
+    async def discard_views(self, viewer_id: int) -> int:
+        """Выбросить незаписанные просмотры зрителя.
+
+        Дожидается пачки, которая пишется прямо сейчас (при сбое она уже
+        вернулась в буфер). Возвращает число выброшенных событий.
+        """
+        async with self._lock:
+            viewed_ids = self._by_viewer.pop(viewer_id, set())
+            for viewed_id in viewed_ids:
+                del self._views[(viewer_id, viewed_id)]
+            return len(viewed_ids)
+
+    async def discard_between(
+        self,
+        user1_id: int,
+        user2_id: int,
+        dislikes: bool = True,
+        views: bool = True
+    ) -> int:
+        """Выбросить незаписанные дизлайки и/или просмотры между двумя пользователями.
+
+        Как и discard_views, дожидается пачки, которая пишется прямо сейчас.
+        Возвращает число выброшенных событий.
+        """
+        async with self._lock:
+            dropped = 0
+            if dislikes:
+                pair = {user1_id, user2_id}
+                kept = [d for d in self._dislikes if {d["from_user_id"], d["to_user_id"]} != pair]
+                dropped += len(self._dislikes) - len(kept)
+                self._dislikes = kept
+            if views:
+                for viewer_id, viewed_id in ((user1_id, user2_id), (user2_id, user1_id)):
+                    if self._views.pop((viewer_id, viewed_id), None) is not None:
+                        self._by_viewer[viewer_id].discard(viewed_id)
+                        dropped += 1
+            return dropped
+
+    def _take_between(
+        self,
+        user1_id: int,
+        user2_id: int
+    ) -> Tuple[List[Dict], Dict[Tuple[int, int], datetime]]:
+        """Забрать из буфера события между двумя пользователями."""
+        pair = {user1_id, user2_id}
+        dislikes = [d for d in self._dislikes if {d["from_user_id"], d["to_user_id"]} == pair]
+        if dislikes:
+            self._dislikes = [
+                d for d in self._dislikes if {d["from_user_id"], d["to_user_id"]} != pair
+            ]
+        views = {}
+        for key in ((user1_id, user2_id), (user2_id, user1_id)):
+            if key in self._views:
+                views[key] = self._views.pop(key)
+                viewer_id, viewed_id = key
+                self._by_viewer[viewer_id].discard(viewed_id)
+                self._flushing.setdefault(viewer_id, set()).add(viewed_id)
+        return dislikes, views
+
+    def _requeue(self, dislikes: List[Dict], views: Dict[Tuple[int, int], datetime]) -> None:
+        """Вернуть в буфер пачку, которую не удалось записать.
+
+        Старые события встают впереди новых; для повторного просмотра той же
+        анкеты остаётся более позднее время.
+        """
+        self._dislikes[:0] = dislikes
+        views.update(self._views)
+        self._views = views
+
+        overflow = len(self) - self.max_pending
+        if overflow > 0:
+            logger.error(f"Буфер свайпов переполнен, отброшено {overflow} старых событий")
+            dropped = min(overflow, len(self._dislikes))
+            del self._dislikes[:dropped]
+            for key in list(itertools.islice(self._views, overflow - dropped)):
+                del self._views[key]
+
+        self._by_viewer = {}
+        for viewer_id, viewed_id in self._views:
+            self._by_viewer.setdefault(viewer_id, set()).add(viewed_id)
+
+    async def _run(self) -> None:
+        """Записывать события по таймеру или при переполнении буфера."""
+        loop = asyncio.get_running_loop()
+        backoff = 0.0
+        while True:
+            deadline = loop.time() + (backoff or self.flush_interval)
+            while not self._stopping:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+                self._wakeup.clear()
+                # После ошибки переполнение буфера не сокращает паузу
+                if not backoff:
+                    break
+            if await self.flush():
+                backoff = 0.0
+            else:
+                backoff = min(self.MAX_BACKOFF, max(backoff * 2, self.flush_interval))
+            if self._stopping:
+                return
+
+
+swipe_buffer = SwipeBuffer(
+    flush_interval=Config.SWIPE_BUFFER_FLUSH_MS / 1000,
+    max_events=Config.SWIPE_BUFFER_MAX_EVENTS,
+)
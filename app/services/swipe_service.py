@@ -0,0 +1,153 @@
+"""Сервис свайпов."""
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Text, and_, delete, exists, insert, literal, or_, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.config import Config
+from app.database.models import Like, Match, User, ViewedProfile
+from app.database.on_commit import after_commit
+from app.database.repositories.like_repo import LikeRepository
+from app.services.match_cache import match_cache
+from app.services.matching_service import MatchingService
+from app.services.seen_set import seen_set_store
+from app.services.swipe_buffer import swipe_buffer
+
+
+class SwipeResult(NamedTuple):
+    """Итог лайка."""
+    matched: bool
+    user: Optional[User]     # кто лайкнул
+    partner: Optional[User]  # кого лайкнули (с загруженным вузом)
+
+
+class SwipeService:
+    """Сервис свайпов."""
+
+    @staticmethod
+    async def like(
+        session: AsyncSession,
+        from_user_id: int,
+        to_user_id: int,
+        message: Optional[str] = None
+    ) -> SwipeResult:
+        """Лайкнуть анкету одним запросом.
+
+        Один WITH-запрос проверяет встречный лайк и дальше либо сохраняет
+        лайк и отметку просмотра, либо создаёт мэтч и удаляет лайки и
+        просмотры между пользователями, чтобы следующие лайки работали
+        «с нуля». Тот же запрос возвращает обоих пользователей и
+        поправляет их incoming_likes_count (в возвращённых объектах —
+        значение до запроса).
+
+        Все части WITH видят один снимок данных, поэтому при мэтче новый
+        лайк просто не вставляется: удалить его в том же запросе нельзя.
+        Отложенные дизлайки и просмотры пары (см. swipe_buffer) записываются
+        до запроса, иначе после мэтча они вернулись бы в БД.
+        """
+        await swipe_buffer.flush(between=(from_user_id, to_user_id))
+        now = datetime.utcnow()
+        first_id, second_id = sorted([from_user_id, to_user_id])
+
+        mutual = select(
+            exists().where(
+                Like.from_user_id == to_user_id,
+                Like.to_user_id == from_user_id,
+                Like.is_like == True
+            ).label("ok")
+        ).cte("mutual")
+        is_mutual = select(mutual.c.ok).scalar_subquery()
+
+        new_like = insert(Like).from_select(
+            ["from_user_id", "to_user_id", "is_like", "message", "created_at"],
+            select(
+                literal(from_user_id),
+                literal(to_user_id),
+                true(),
+                literal(message, Text),
+                literal(now)
+            ).where(~is_mutual)
+        ).returning(Like.id).cte("new_like")
+        new_match = pg_insert(Match).from_select(
+            ["user1_id", "user2_id", "is_active", "created_at"],
+            select(
+                literal(first_id),
+                literal(second_id),
+                true(),
+                literal(now)
+            ).where(is_mutual)
+        )
+        # Пара уже мэтчилась — оживляем её строку (см. MatchRepository.create)
+        new_match = new_match.on_conflict_do_update(
+            index_elements=[Match.user1_id, Match.user2_id],
+            set_={"is_active": True, "created_at": new_match.excluded.created_at}
+        ).returning(Match.id).cte("new_match")
+        dropped_likes = delete(Like).where(
+            or_(
+                and_(Like.from_user_id == from_user_id, Like.to_user_id == to_user_id),
+                and_(Like.from_user_id == to_user_id, Like.to_user_id == from_user_id),
+            ),
+            is_mutual
+        ).returning(Like.to_user_id, Like.is_like).cte("dropped_likes")
+        # Счётчик входящих лайков: +1 получателю или минус удалённые при мэтче
+        counted = update(User).where(
+            User.id == to_user_id,
+            ~is_mutual
+        ).values(
+            incoming_likes_count=User.incoming_likes_count + 1,
+            # Счётчик — не правка анкеты, onupdate для updated_at не нужен
+            updated_at=User.updated_at
+        ).returning(User.id).cte("counted")
+        uncounted = LikeRepository.uncount_deleted(dropped_likes).returning(User.id).cte("uncounted")
+        writes = [new_like, new_match, dropped_likes, counted, uncounted]
+
+        if Config.SEEN_SET_BACKEND != "compact":
+            new_view = insert(ViewedProfile).from_select(
+                ["viewer_id", "viewed_id", "created_at"],
+                select(
+                    literal(from_user_id),
+                    literal(to_user_id),
+                    literal(now)
+                ).where(
+                    ~is_mutual,
+                    # Анкету, которая ещё скрыта из ленты, второй раз не отмечаем
+                    ~MatchingService.seen_condition(from_user_id, to_user_id)
+                )
+            ).returning(ViewedProfile.id).cte("new_view")
+            dropped_views = delete(ViewedProfile).where(
+                or_(
+                    and_(ViewedProfile.viewer_id == from_user_id, ViewedProfile.viewed_id == to_user_id),
+                    and_(ViewedProfile.viewer_id == to_user_id, ViewedProfile.viewed_id == from_user_id),
+                ),
+                is_mutual
+            ).returning(ViewedProfile.id).cte("dropped_views")
+            writes += [new_view, dropped_views]
+
+        stmt = (
+            select(User, is_mutual)
+            .where(User.id.in_([from_user_id, to_user_id]))
+            .options(joinedload(User.university))
+            .add_cte(*writes)
+        )
+        result = await session.execute(stmt)
+
+        matched = False
+        users = {}
+        for user, ok in result:
+            users[user.id] = user
+            matched = bool(ok)
+
+        if matched:
+            after_commit(session, lambda: match_cache.remember(from_user_id, to_user_id))
+
+        if Config.SEEN_SET_BACKEND == "compact":
+            # Множество просмотренных — не строки, его правим отдельно
+            if matched:
+                await seen_set_store.discard_between(session, from_user_id, to_user_id)
+            else:
+                await seen_set_store.add(session, from_user_id, to_user_id)
+
+        return SwipeResult(matched, users.get(from_user_id), users.get(to_user_id))
@@ -0,0 +1,122 @@
+"""Справочник университетов в памяти с быстрым поиском."""
+import logging
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import University
+
+logger = logging.getLogger(__name__)
+
+# Подстроки до этой длины индексируются целиком, длиннее — по n-граммам
+GRAM_SIZE = 3
+
+
+class UniversityEntry(NamedTuple):
+    """Снимок университета, не привязанный к сессии."""
+    id: int
+    name: str
+    short_name: str
+    city: str
+
+
+def _grams(text: str, size: int) -> Set[str]:
+    """Все подстроки text длиной size."""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class UniversityCatalog:
+    """Активные университеты для inline-поиска и выбора по аббревиатуре.
+
+    Каталог загружается из БД при первом обращении и перечитывается после
+    invalidate(), который вызывают обработчики админки при добавлении,
+    изменении и удалении университета. Поиск по подстроке в названии,
+    аббревиатуре и городе идёт по индексу n-грамм: все подстроки длиной
+    до GRAM_SIZE сразу дают ответ, для длинных запросов пересекаются
+    списки их n-грамм и кандидаты проверяются напрямую.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[UniversityEntry] = []
+        self._by_short_name: Dict[str, UniversityEntry] = {}
+        # n-грамма -> позиции в _entries (по возрастанию)
+        self._grams: Dict[str, List[int]] = {}
+        self._haystacks: List[str] = []
+        self._stale = True
+
+    def invalidate(self) -> None:
+        """Перечитать каталог из БД при следующем обращении."""
+        self._stale = True
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        """Загрузить каталог, если он ещё не загружен или устарел."""
+        if not self._stale:
+            return
+        # Снимаем флаг до запроса: invalidate во время загрузки вызовет ещё одну
+        self._stale = False
+        stmt = (
+            select(University.id, University.name, University.short_name, University.city)
+            .where(University.is_active == True)
+            .order_by(University.id)
+        )
+        try:
+            rows = (await session.execute(stmt)).all()
+        except Exception:
+            self._stale = True
+            raise
+        self.build([UniversityEntry(*row) for row in rows])
+
+    def build(self, entries: List[UniversityEntry]) -> None:
+        """Построить каталог и индекс по готовому списку университетов."""
+        grams: Dict[str, List[int]] = {}
+        haystacks = []
+        for pos, entry in enumerate(entries):
+            # \n не встречается в запросе, поэтому совпадение не «перепрыгнет»
+            # с одного поля на другое
+            haystack = "\n".join((entry.name, entry.short_name, entry.city)).lower()
+            haystacks.append(haystack)
+            entry_grams: Set[str] = set()
+            for size in range(1, GRAM_SIZE + 1):
+                entry_grams |= _grams(haystack, size)
+            for gram in entry_grams:
+                grams.setdefault(gram, []).append(pos)
+
+        self._entries = entries
+        self._haystacks = haystacks
+        self._grams = grams
+        self._by_short_name = {entry.short_name: entry for entry in entries}
+        logger.info(f"Каталог университетов загружен: {len(entries)}")
+
+    def all(self) -> List[UniversityEntry]:
+        """Все активные университеты."""
+        return list(self._entries)
+
+    def get_by_short_name(self, short_name: str) -> Optional[UniversityEntry]:
+        """Найти университет по точной аббревиатуре."""
+        return self._by_short_name.get(short_name)
+
+    def search(self, query: str, limit: int = 50) -> List[UniversityEntry]:
+        """Университеты, у которых query входит в название, аббревиатуру или город."""
+        query = query.lower()
+        if not query:
+            return self._entries[:limit]
+        if len(query) <= GRAM_SIZE:
+            positions = self._grams.get(query, [])
+            return [self._entries[pos] for pos in positions[:limit]]
+
+        # Начинаем с самого короткого списка, остальные проверяем подстрокой
+        postings = sorted(
+            (self._grams.get(gram, []) for gram in _grams(query, GRAM_SIZE)),
+            key=len
+        )
+        found = []
+        for pos in postings[0]:
+            if query in self._haystacks[pos]:
+                found.append(self._entries[pos])
+                if len(found) >= limit:
+                    break
+        return found
+
+
+university_catalog = UniversityCatalog()
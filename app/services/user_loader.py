@@ -0,0 +1,53 @@
+"""Пользователь текущего апдейта."""
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.database.models import User
+
+
+class UserLoader:
+    """Загружает автора апдейта (вместе с вузом) один раз на апдейт.
+
+    DbSessionMiddleware кладёт загрузчик в session.info и в данные
+    обработчика. UserRepository.get_by_telegram_id, get_by_id и
+    get_with_university для этого пользователя отвечают из памяти, так что
+    middleware и обработчики делят один SELECT. Объект живёт в той же
+    сессии, поэтому UPDATE через ORM обновляет и его.
+    """
+
+    def __init__(self, session: AsyncSession, telegram_id: Optional[int]) -> None:
+        self.session = session
+        self.telegram_id = telegram_id
+        self.user: Optional[User] = None
+
+    @staticmethod
+    def of(session: AsyncSession) -> Optional["UserLoader"]:
+        """Загрузчик, привязанный к сессии (если есть)."""
+        return session.info.get("user_loader")
+
+    def attach(self) -> "UserLoader":
+        """Привязать загрузчик к сессии."""
+        self.session.info["user_loader"] = self
+        return self
+
+    async def get(self) -> Optional[User]:
+        """Получить пользователя апдейта с загруженным вузом."""
+        # «Не найден» не запоминаем: пользователь может зарегистрироваться
+        # в этом же апдейте
+        if self.user is None and self.telegram_id is not None:
+            stmt = (
+                select(User)
+                .options(joinedload(User.university))
+                .where(User.telegram_id == self.telegram_id)
+            )
+            self.user = await self.session.scalar(stmt)
+        return self.user
+
+    def cached(self, user_id: int) -> Optional[User]:
+        """Уже загруженный пользователь, если у него этот ID."""
+        if self.user is not None and self.user.id == user_id:
+            return self.user
+        return None
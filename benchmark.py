@@ -0,0 +1,710 @@
+"""Бенчмарки горячих запросов бота.
+
+Запуск:
+    python benchmark.py feed-exclusion
+    python benchmark.py explain-feed
+    python benchmark.py ranking
+    python benchmark.py reset-views
+    python benchmark.py mutual-like
+    python benchmark.py university-search
+    python benchmark.py send-queue
+    python benchmark.py send-queue-retry
+    python benchmark.py swipe-buffer-retry
+
+Все тестовые данные создаются внутри транзакции, которая в конце
+откатывается, поэтому в базе после замеров ничего не остаётся.
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Tuple
+
+import numpy as np
+from sqlalchemy import delete, event, insert, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import Config
+from app.database.models import Like, University, User, ViewedProfile
+from app.database.repositories.like_repo import LikeRepository
+from app.services.matching_service import FeedViewer, MatchingService
+from app.services.ranking import CandidateFeatures, top_k
+from app.services.swipe_buffer import SwipeBuffer
+from app.services.university_catalog import UniversityCatalog, UniversityEntry
+from app.middlewares.outbound_middleware import (
+    OutboundRateLimitMiddleware,
+    TokenBucket,
+    background_sends,
+)
+
+# Отрицательные telegram_id, не пересекающиеся с реальными и фейковыми
+_telegram_ids = itertools.count(10 ** 15)
+
+
+@asynccontextmanager
+async def scratch_session():
+    """Сессия внутри транзакции, которая откатывается после замеров."""
+    engine = create_async_engine(Config.DATABASE_URL, echo=False)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+@contextmanager
+def count_statements(session: AsyncSession):
+    """Посчитать SQL-запросы, выполненные в сессии внутри блока."""
+    statements: List[str] = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+async def seed_users(
+    session: AsyncSession,
+    count: int,
+    gender: str = "female",
+    looking_for: str = "any"
+) -> Tuple[int, List[int]]:
+    """Создать тестовый вуз с пользователями, подходящими для ленты."""
+    university = University(
+        name=f"Benchmark {time.time_ns()}",
+        short_name="BENCH",
+        city="Bench"
+    )
+    session.add(university)
+    await session.flush()
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "telegram_id": -next(_telegram_ids),
+            "name": f"User {i}",
+            "age": 18 + i % 10,
+            "gender": gender,
+            "looking_for": looking_for,
+            "bio": "",
+            "photo_1": "",
+            "university_id": university.id,
+            "is_active": True,
+            "is_banned": False,
+            "is_registered": True,
+            "show_in_search": True,
+            "is_fake": False,
+            "is_super_favorite": False,
+            "created_at": now,
+            "updated_at": now,
+            "last_active": now - timedelta(seconds=i),
+        }
+        for i in range(count)
+    ]
+    result = await session.execute(insert(User).returning(User.id), rows)
+    return university.id, list(result.scalars().all())
+
+
+async def measure(
+    func: Callable[[], Awaitable[object]],
+    repeats: int
+) -> float:
+    """Медианное время вызова в миллисекундах."""
+    await func()  # прогрев
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def bench_feed_exclusion(repeats: int) -> None:
+    """Сравнить NOT IN и NOT EXISTS при 100, 1k и 10k просмотров."""
+    print("📊 Исключение просмотренных анкет: NOT IN против NOT EXISTS\n")
+    async with scratch_session() as session:
+        university_id, user_ids = await seed_users(session, 12_000)
+        viewer_id, candidate_ids = user_ids[0], user_ids[1:]
+        viewer = FeedViewer(viewer_id, university_id, "male", "female")
+
+        print(f"{'просмотров':>12} | {'not_in, мс':>12} | {'not_exists, мс':>15}")
+        for views in (100, 1_000, 10_000):
+            await session.execute(
+                delete(ViewedProfile).where(ViewedProfile.viewer_id == viewer_id)
+            )
+            await session.execute(
+                insert(ViewedProfile),
+                [
+                    {"viewer_id": viewer_id, "viewed_id": viewed_id, "created_at": datetime.utcnow()}
+                    for viewed_id in candidate_ids[:views]
+                ]
+            )
+
+            results = {}
+            for mode in ("not_in", "not_exists"):
+                results[mode] = await measure(
+                    lambda: MatchingService.get_candidates(
+                        session,
+                        viewer,
+                        limit=Config.FEED_BATCH_SIZE,
+                        exclusion=mode
+                    ),
+                    repeats
+                )
+            print(f"{views:>12} | {results['not_in']:>12.2f} | {results['not_exists']:>15.2f}")
+
+
+async def explain_feed(repeats: int) -> None:
+    """Проверить по EXPLAIN, что запрос ленты идёт через ix_users_feed.
+
+    Завершается с кодом 1, если планировщик выбрал другой план —
+    например, если миграция с индексом не применена.
+    """
+    print("🔍 План запроса ленты на тестовом наборе данных\n")
+    async with scratch_session() as session:
+        university_ids = []
+        for _ in range(20):
+            university_id, user_ids = await seed_users(session, 2_000)
+            university_ids.append(university_id)
+        await session.execute(text("ANALYZE users"))
+
+        viewer = FeedViewer(user_ids[0], university_ids[-1], "male", "female")
+        query = MatchingService.candidate_query(viewer, Config.FEED_BATCH_SIZE)
+        sql = query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True}
+        )
+        result = await session.execute(text(f"EXPLAIN {sql}"))
+        plan = "\n".join(row[0] for row in result)
+
+    print(plan)
+    if "ix_users_feed" not in plan:
+        print("\n❌ Планировщик не использует ix_users_feed")
+        sys.exit(1)
+    print("\n✅ Запрос ленты использует ix_users_feed")
+
+
+async def bench_ranking(repeats: int) -> None:
+    """Замерить ранжирование пачки кандидатов в памяти.
+
+    Порог budget_ms проверяется для оценки и top-k (score + top_k). Сборка
+    признаков из строк запроса (CandidateFeatures.from_rows) замеряется и
+    печатается отдельно. Завершается с кодом 1, если пачка из нескольких
+    тысяч кандидатов ранжируется дольше budget_ms.
+    """
+    print("🏁 Ранжирование пачки кандидатов (без БД)\n")
+    rng = np.random.default_rng(0)
+    now = time.time()
+    budget_ms = 1.0
+    failed = False
+
+    print(f"{'кандидатов':>12} | {'top-k':>6} | {'признаки, мс':>12} | {'top-k, мс':>10}")
+    for size in (1_000, 2_000, 5_000):
+        # Строки в том виде, в каком их возвращает load_features
+        rows = list(zip(
+            range(size),
+            (now - rng.uniform(0, 30 * 24 * 3600, size)).tolist(),
+            rng.integers(17, 30, size).tolist(),
+            [("bio" if flag else None) for flag in rng.random(size) < 0.7],
+            [("file" if flag else None) for flag in rng.random(size) < 0.5],
+            [("file" if flag else None) for flag in rng.random(size) < 0.3],
+            (rng.random(size) < 0.01).tolist(),
+            (rng.random(size) < 0.05).tolist(),
+        ))
+        features = CandidateFeatures.from_rows(rows)
+        k = Config.FEED_BATCH_SIZE
+
+        async def build() -> None:
+            CandidateFeatures.from_rows(rows)
+
+        async def run() -> None:
+            top_k(features, 20, now, k)
+
+        build_ms = await measure(build, repeats)
+        elapsed = await measure(run, repeats)
+        failed = failed or elapsed > budget_ms
+        print(f"{size:>12} | {k:>6} | {build_ms:>12.3f} | {elapsed:>10.3f}")
+
+    if failed:
+        print(f"\n❌ Ранжирование дольше {budget_ms} мс на пачку")
+        sys.exit(1)
+    print(f"\n✅ Ранжирование укладывается в {budget_ms} мс на пачку")
+
+
+async def bench_reset_views(repeats: int) -> None:
+    """Проверить, что сброс просмотров и лайков — один запрос при любом объёме.
+
+    Завершается с кодом 1, если число SQL-запросов зависит от числа строк.
+    """
+    print("🧹 Сброс просмотров и лайков между пользователями\n")
+    if Config.SEEN_SET_BACKEND != "table":
+        print("⚠️ Проверка рассчитана на SEEN_SET_BACKEND=table")
+        return
+
+    async with scratch_session() as session:
+        _, user_ids = await seed_users(session, 20_001)
+        viewer_id, other_ids = user_ids[0], user_ids[1:]
+        partner_id = other_ids[0]
+        counts = set()
+
+        print(f"{'строк':>8} | {'запросов':>9} | {'удалено':>8} | {'мс':>8}")
+        for rows in (10, 1_000, 20_000):
+            now = datetime.utcnow()
+            await session.execute(
+                insert(ViewedProfile),
+                [
+                    {"viewer_id": viewer_id, "viewed_id": viewed_id, "created_at": now}
+                    for viewed_id in other_ids[:rows]
+                ]
+            )
+            await session.execute(
+                insert(Like),
+                [
+                    {"from_user_id": viewer_id, "to_user_id": partner_id, "is_like": True, "created_at": now}
+                    for _ in range(rows)
+                ]
+            )
+
+            started = time.perf_counter()
+            with count_statements(session) as statements:
+                views = await MatchingService.reset_views(session, viewer_id)
+                likes = await LikeRepository.delete_between_users(session, viewer_id, partner_id)
+            elapsed = (time.perf_counter() - started) * 1000
+
+            counts.add(len(statements))
+            print(f"{rows:>8} | {len(statements):>9} | {views + likes:>8} | {elapsed:>8.2f}")
+
+    if len(counts) != 1:
+        print("\n❌ Число запросов растёт вместе с числом строк")
+        sys.exit(1)
+    print("\n✅ Число запросов не зависит от числа строк")
+
+
+# Размер таблицы likes для mutual-like (десятки миллионов строк)
+MUTUAL_LIKE_ROWS = 20_000_000
+
+
+async def bench_mutual_like(repeats: int) -> None:
+    """Сравнить check_mutual_like с индексом ix_likes_mutual и без него.
+
+    Лайки генерируются generate_series внутри откатываемой транзакции,
+    индекс для второго замера удаляется там же.
+    """
+    print(f"💞 Проверка встречного лайка на {MUTUAL_LIKE_ROWS:,} лайках\n")
+    async with scratch_session() as session:
+        _, user_ids = await seed_users(session, 10_000)
+        low, high = min(user_ids), max(user_ids)
+        span = high - low + 1
+
+        print("   ... генерация лайков")
+        await session.execute(
+            text(
+                "INSERT INTO likes (from_user_id, to_user_id, is_like, created_at) "
+                "SELECT :low + (g * 7919) % :span, :low + (g * 104729) % :span, "
+                "g % 3 <> 0, now() "
+                "FROM generate_series(1, :rows) AS g"
+            ),
+            {"low": low, "span": span, "rows": MUTUAL_LIKE_ROWS}
+        )
+        await session.execute(text("ANALYZE likes"))
+
+        pairs = list(zip(user_ids[:repeats], reversed(user_ids[-repeats:])))
+        calls = itertools.cycle(pairs)
+
+        async def check() -> None:
+            user1_id, user2_id = next(calls)
+            await LikeRepository.check_mutual_like(session, user1_id, user2_id)
+
+        with_index = await measure(check, repeats)
+        await session.execute(text("DROP INDEX IF EXISTS ix_likes_mutual"))
+        without_index = await measure(check, repeats)
+
+    print(f"{'ix_likes_mutual':>16} | {'мс':>8}")
+    print(f"{'есть':>16} | {with_index:>8.3f}")
+    print(f"{'нет':>16} | {without_index:>8.3f}")
+
+
+async def bench_university_search(repeats: int) -> None:
+    """Замерить inline-поиск по каталогу университетов (без БД).
+
+    Завершается с кодом 1, если поиск дольше миллисекунды или расходится
+    с прямым перебором по подстроке.
+    """
+    print("🏁 Поиск по каталогу университетов (без БД)\n")
+    rng = np.random.default_rng(0)
+    letters = list("абвгдеёжзиклмнопрстуфхцчшщэюя")
+
+    def word(size: int) -> str:
+        return "".join(rng.choice(letters, size))
+
+    budget_ms = 1.0
+    failed = False
+    print(f"{'вузов':>8} | {'запрос':>10} | {'найдено':>8} | {'мс':>8}")
+    for size in (500, 5_000):
+        entries = [
+            UniversityEntry(i, f"Университет {word(8)} {word(6)}", word(4).upper(), word(7))
+            for i in range(size)
+        ]
+        catalog = UniversityCatalog()
+        catalog.build(entries)
+        for query in ("у", "ни", entries[1].short_name.lower(), "итет " + entries[2].name.split()[1][:4]):
+            expected = [
+                e for e in entries
+                if query in e.name.lower() or query in e.short_name.lower() or query in e.city.lower()
+            ][:50]
+            if catalog.search(query) != expected:
+                print(f"❌ Результат поиска «{query}» не совпадает с перебором")
+                sys.exit(1)
+
+            async def run() -> None:
+                catalog.search(query)
+
+            elapsed = await measure(run, repeats)
+            failed = failed or elapsed > budget_ms
+            print(f"{size:>8} | {query:>10} | {len(expected):>8} | {elapsed:>8.3f}")
+
+    if failed:
+        print(f"\n❌ Поиск дольше {budget_ms} мс")
+        sys.exit(1)
+    print(f"\n✅ Поиск укладывается в {budget_ms} мс")
+
+
+async def bench_send_queue(repeats: int) -> None:
+    """Прогнать очередь отправок против локального фейкового Bot API.
+
+    Фейковый сервер отвечает 429 с retry_after, когда превышен общий лимит
+    или лимит чата, и ещё на 2% запросов случайно. Завершается с кодом 1,
+    если хоть одна отправка не дошла или интерактивные ответы ждали
+    дольше уведомлений.
+    """
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiohttp import web
+
+    global_rate, chat_rate = 200.0, 5.0
+    chats = 40
+    interactive_count = 100 * repeats // 20
+    background_count = 400 * repeats // 20
+    print(
+        f"🏁 Очередь отправок: {interactive_count} ответов и {background_count} "
+        f"уведомлений в {chats} чатов, лимиты {global_rate:.0f}/с и {chat_rate:.0f}/с на чат\n"
+    )
+
+    rng = np.random.default_rng(0)
+    # Сервер разрешает чуть больше, чем отправляет очередь: +1 токен запаса
+    server_global = TokenBucket(global_rate, global_rate / 10 + 1)
+    server_chats = {}
+    stats = {"ok": 0, "limited": 0, "injected": 0}
+    message_ids = itertools.count(1)
+
+    async def handle(request: web.Request) -> web.Response:
+        form = await request.post()
+        chat_id = int(form["chat_id"])
+        now = time.monotonic()
+        chat = server_chats.setdefault(chat_id, TokenBucket(chat_rate, 2 + 1))
+        if rng.random() < 0.02:
+            stats["injected"] += 1
+            limited = True
+        else:
+            limited = chat.wait_time(now) > 0 or server_global.wait_time(now) > 0
+            stats["limited"] += limited
+        if limited:
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1},
+            })
+        chat.reserve(now)
+        server_global.reserve(now)
+        stats["ok"] += 1
+        return web.json_response({"ok": True, "result": {
+            "message_id": next(message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": form.get("text", ""),
+        }})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{port}"))
+    limiter = OutboundRateLimitMiddleware(
+        global_rate=global_rate,
+        global_burst=global_rate / 10,
+        chat_rate=chat_rate,
+        chat_burst=2,
+        max_retries=5,
+    )
+    session.middleware(limiter)
+    bot = Bot(token="42:FAKE", session=session)
+
+    latencies = {"interactive": [], "background": []}
+    failures = []
+
+    async def send(lane: str, chat_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        started = time.perf_counter()
+        try:
+            if lane == "background":
+                with background_sends():
+                    await bot.send_message(chat_id=chat_id, text=lane)
+            else:
+                await bot.send_message(chat_id=chat_id, text=lane)
+        except Exception as e:
+            failures.append(e)
+            return
+        latencies[lane].append((time.perf_counter() - started) * 1000)
+
+    # Уведомления приходят пачкой сразу, ответы — равномерно поверх неё
+    duration = background_count / global_rate
+    jobs = [
+        send("background", int(rng.integers(1, chats + 1)), 0.0)
+        for _ in range(background_count)
+    ] + [
+        send("interactive", int(rng.integers(1, chats + 1)), float(rng.uniform(0, duration)))
+        for _ in range(interactive_count)
+    ]
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*jobs)
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+    elapsed = time.perf_counter() - started
+
+    print(f"{'полоса':>12} | {'отправлено':>10} | {'p50, мс':>9} | {'p95, мс':>9}")
+    for lane, values in latencies.items():
+        if values:
+            p50, p95 = np.percentile(values, [50, 95])
+            print(f"{lane:>12} | {len(values):>10} | {p50:>9.1f} | {p95:>9.1f}")
+    print(
+        f"\nЗа {elapsed:.1f} с: сервер принял {stats['ok']}, отклонил по лимиту "
+        f"{stats['limited']}, случайных 429 {stats['injected']}, повторов в очереди {limiter.retried}"
+    )
+
+    if failures:
+        print(f"\n❌ Не доставлено {len(failures)} сообщений: {failures[0]}")
+        sys.exit(1)
+    if np.median(latencies["interactive"]) >= np.median(latencies["background"]):
+        print("\n❌ Интерактивные ответы ждали не меньше уведомлений")
+        sys.exit(1)
+    print("\n✅ Все сообщения доставлены, ответы обгоняют уведомления")
+
+
+async def check_send_queue_retry(repeats: int) -> None:
+    """Проверить, что повтор после 429 ждёт retry_after.
+
+    И для отправки (лимит чата), и для удаления (только общий лимит) второй
+    запрос должен уйти не раньше чем через retry_after секунд после первого;
+    запрос в другой чат тоже ждёт общую паузу. Завершается с кодом 1 иначе.
+    """
+    from aiogram.exceptions import TelegramRetryAfter
+    from aiogram.methods import DeleteMessage, SendMessage
+
+    print("🏁 Повтор запросов после 429\n")
+    retry_after = 1
+    failed = False
+
+    for method in (
+        SendMessage(chat_id=1, text="x"),
+        DeleteMessage(chat_id=1, message_id=1),
+    ):
+        limiter = OutboundRateLimitMiddleware(
+            global_rate=30, global_burst=30, chat_rate=1, chat_burst=5, max_retries=3
+        )
+        attempts: List[float] = []
+
+        async def make_request(bot, sent):
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise TelegramRetryAfter(sent, "Too Many Requests", retry_after)
+            return None
+
+        await limiter(make_request, None, method)
+        first_retry = attempts[1] - attempts[0]
+        ok = len(attempts) == 2 and first_retry >= retry_after
+        failed = failed or not ok
+        print(
+            f"{type(method).__name__:>14}: попыток {len(attempts)}, "
+            f"повтор через {first_retry:.2f} с {'✅' if ok else '❌'}"
+        )
+
+    limiter = OutboundRateLimitMiddleware(
+        global_rate=30, global_burst=30, chat_rate=1, chat_burst=5, max_retries=3
+    )
+    started: List[float] = []
+
+    async def limited(bot, sent):
+        started.append(time.monotonic())
+        if sent.chat_id == 1 and len(started) == 1:
+            raise TelegramRetryAfter(sent, "Too Many Requests", retry_after)
+
+    first = asyncio.create_task(limiter(limited, None, SendMessage(chat_id=1, text="x")))
+    await asyncio.sleep(0.05)
+    await limiter(limited, None, SendMessage(chat_id=2, text="y"))
+    await first
+    waited = started[1] - started[0]
+    ok = waited >= retry_after
+    failed = failed or not ok
+    print(f"{'другой чат':>14}: ждал общую паузу {waited:.2f} с {'✅' if ok else '❌'}")
+
+    if failed:
+        print(f"\n❌ Повтор ушёл раньше retry_after={retry_after} с")
+        sys.exit(1)
+    print(f"\n✅ Повторы ждут retry_after={retry_after} с")
+
+
+async def check_swipe_buffer_retry(repeats: int) -> None:
+    """Проверить, что SwipeBuffer не теряет события при ошибке commit.
+
+    Первая запись падает: события должны остаться в буфере (и в
+    pending_views), а следующая запись — сохранить каждое ровно один раз
+    вместе с событиями, пришедшими между попытками. При переполнении
+    должны отбрасываться самые старые события, flush(between=...) —
+    записывать только события пары, а discard_* — выбрасывать вернувшиеся
+    после сбоя события, которые стёр бы DELETE. Завершается с кодом 1 иначе.
+    """
+    print("🏁 Повтор записи буфера свайпов\n")
+    written: List[dict] = []
+    failures = [1]
+
+    class FlakySession:
+        """Сессия, у которой падает commit, пока failures[0] > 0."""
+
+        def __init__(self) -> None:
+            self.rows: List[dict] = []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc) -> bool:
+            return False
+
+        async def execute(self, statement, rows=None) -> None:
+            self.rows.extend(rows or [])
+
+        async def commit(self) -> None:
+            if failures[0] > 0:
+                failures[0] -= 1
+                raise ConnectionError("commit failed")
+            written.extend(self.rows)
+
+    Config.SEEN_SET_BACKEND = "table"
+    buffer = SwipeBuffer(flush_interval=1, max_events=100, session_maker=FlakySession)
+    buffer.dislike(1, 2)
+    buffer.view(1, 3)
+    checks = []
+
+    ok = not await buffer.flush()
+    checks.append(("ошибка commit вернула пачку", ok and len(buffer) == (3 if Config.STORE_DISLIKES else 2)))
+    checks.append(("просмотры видны ленте", buffer.pending_views(1) == {2, 3}))
+
+    buffer.view(1, 4)
+    ok = await buffer.flush()
+    viewed = sorted(row["viewed_id"] for row in written if "viewed_id" in row)
+    dislikes = [row for row in written if "is_like" in row]
+    checks.append(("повтор записал всё один раз", ok and viewed == [2, 3, 4]))
+    checks.append(("дизлайк не потерян", len(dislikes) == (1 if Config.STORE_DISLIKES else 0)))
+    checks.append(("буфер пуст", len(buffer) == 0 and not buffer.pending_views(1)))
+
+    written.clear()
+    failures[0] = 1
+    buffer = SwipeBuffer(flush_interval=1, max_events=100, max_pending=3, session_maker=FlakySession)
+    for viewed_id in range(10, 13):
+        buffer.view(1, viewed_id)
+    await buffer.flush()
+    buffer.view(1, 13)
+    buffer.view(1, 14)
+    failures[0] = 1
+    await buffer.flush()
+    checks.append(("переполнение отбросило старые", buffer.pending_views(1) == {12, 13, 14}))
+
+    written.clear()
+    failures[0] = 0
+    buffer = SwipeBuffer(flush_interval=1, max_events=100, session_maker=FlakySession)
+    buffer.dislike(1, 2)
+    buffer.view(2, 1)
+    buffer.dislike(1, 3)
+    await buffer.flush(between=(2, 1))
+    pairs = sorted(
+        (row.get("viewer_id", row.get("from_user_id")), row.get("viewed_id", row.get("to_user_id")))
+        for row in written
+    )
+    expected = [(1, 2), (1, 2), (2, 1)] if Config.STORE_DISLIKES else [(1, 2), (2, 1)]
+    checks.append(("flush пары записал только её", pairs == expected))
+    checks.append(("остальное ждёт в буфере", buffer.pending_views(1) == {3}))
+
+    # Удаление после неудачной записи: выброшенные события не должны
+    # записаться следующей пачкой и вернуть удалённые строки
+    written.clear()
+    failures[0] = 1
+    buffer = SwipeBuffer(flush_interval=1, max_events=100, session_maker=FlakySession)
+    buffer.dislike(1, 2)
+    buffer.view(1, 3)
+    buffer.view(4, 5)
+    await buffer.flush()
+    await buffer.discard_between(1, 2)
+    await buffer.discard_views(1)
+    await buffer.flush()
+    pairs = [(row.get("viewer_id", row.get("from_user_id")), row.get("viewed_id", row.get("to_user_id")))
+             for row in written]
+    checks.append(("сброс выбросил события", pairs == [(4, 5)]))
+
+    for name, ok in checks:
+        print(f"{name:>30}: {'✅' if ok else '❌'}")
+    if not all(ok for _, ok in checks):
+        print("\n❌ Буфер свайпов теряет события при ошибке записи")
+        sys.exit(1)
+    print("\n✅ События переживают ошибку записи")
+
+
+BENCHMARKS = {
+    "feed-exclusion": bench_feed_exclusion,
+    "explain-feed": explain_feed,
+    "ranking": bench_ranking,
+    "reset-views": bench_reset_views,
+    "mutual-like": bench_mutual_like,
+    "university-search": bench_university_search,
+    "send-queue": bench_send_queue,
+    "send-queue-retry": check_send_queue_retry,
+    "swipe-buffer-retry": check_swipe_buffer_retry,
+}
+
+
+async def main() -> None:
+    """Главная функция."""
+    parser = argparse.ArgumentParser(description="Бенчмарки горячих запросов")
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    await BENCHMARKS[args.name](args.repeats)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\n👋 Прервано пользователем")
+        sys.exit(1)
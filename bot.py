@@ -7,11 +7,19 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from app.config import Config
+from app.database.engine import async_session_maker
 from app.middlewares.db_middleware import DbSessionMiddleware
 from app.middlewares.ban_middleware import BanCheckMiddleware
+from app.middlewares.outbound_middleware import OutboundRateLimitMiddleware
 from app.handlers import (
     start, registration, profile, viewing, likes, matches, messages, reports, admin
 )
+from app.services.activity_tracker import last_active_tracker
+from app.services.ban_list import ban_list
+from app.services.feed_index import feed_index
+from app.services.like_notifier import like_notifier
+from app.services.partition_keeper import partition_keeper
+from app.services.swipe_buffer import swipe_buffer
 
 # Настройка логирования
 logging.basicConfig(
@@ -36,6 +44,16 @@ async def main():
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
     
+    # Все запросы к Bot API идут через общую очередь с лимитами Telegram
+    if Config.SEND_QUEUE_ENABLED:
+        bot.session.middleware(OutboundRateLimitMiddleware(
+            global_rate=Config.TELEGRAM_GLOBAL_RATE,
+            global_burst=Config.TELEGRAM_GLOBAL_BURST,
+            chat_rate=Config.TELEGRAM_CHAT_RATE,
+            chat_burst=Config.TELEGRAM_CHAT_BURST,
+            max_retries=Config.TELEGRAM_SEND_RETRIES,
+        ))
+    
     # Используем MemoryStorage для FSM (можно заменить на Redis)
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
@@ -61,12 +79,45 @@ async def main():
     dp.include_router(reports.router)
     dp.include_router(admin.router)
     
+    # Партиция текущего месяца должна существовать до первой отметки просмотра,
+    # а следующие — появляться, пока бот работает без перезапуска.
+    # DDL выполняется, только если партиций не хватает
+    if Config.VIEWED_PARTITIONS_ON_STARTUP:
+        if await partition_keeper.ensure():
+            partition_keeper.start()
+        else:
+            logger.warning("viewed_profiles не партиционирована, партиции не создаются")
+    
+    # Баны проверяются по множеству в памяти — загружаем его до первого апдейта
+    async with async_session_maker() as session:
+        await ban_list.load(session)
+    ban_list.start()
+    
+    # Индекс ленты строим до запуска polling, чтобы первые свайпы уже шли из памяти
+    if Config.FEED_INDEX_ENABLED:
+        async with async_session_maker() as session:
+            await feed_index.load(session)
+    
+    if Config.SWIPE_BUFFER_ENABLED:
+        swipe_buffer.start()
+    if Config.LAST_ACTIVE_FLUSH_SECONDS > 0:
+        last_active_tracker.start()
+    if Config.LIKE_NOTIFY_QUIET_SECONDS > 0:
+        # Подхватывает и уведомления, отложенные до перезапуска
+        like_notifier.start(bot)
+    
     logger.info("Бот запущен")
     
     # Запуск polling
     try:
         await dp.start_polling(bot, skip_updates=True)
     finally:
+        # Дописываем отложенные свайпы до закрытия
+        await swipe_buffer.stop()
+        await like_notifier.stop()
+        await ban_list.stop()
+        await partition_keeper.stop()
+        await last_active_tracker.stop()
         await bot.session.close()
 
 
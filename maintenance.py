@@ -0,0 +1,203 @@
+"""Служебные команды для обслуживания базы данных.
+
+Запуск:
+    python maintenance.py seen-sets-import [--purge]
+    python maintenance.py seen-sets-export [--purge]
+    python maintenance.py viewed-partitions [--drop]
+    python maintenance.py likes-counters
+
+viewed-partitions стоит запускать по расписанию (например, раз в сутки):
+создаёт партиции viewed_profiles на VIEWED_PARTITIONS_AHEAD месяцев вперёд
+и отсоединяет (с --drop — удаляет) партиции старше VIEWED_RETENTION_DAYS
+(если он задан).
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from typing import Dict, Set
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import Config
+from app.database.engine import async_session_maker
+from app.database.partitions import ensure_partitions, expire_partitions, is_partitioned
+from app.database.repositories.like_repo import LikeRepository
+from app.database.models import ViewedProfile, ViewedSet
+from app.services.seen_set import decode_ids, encode_ids
+
+BATCH_SIZE = 500
+# Ограничение asyncpg — не больше 32767 параметров в одном запросе
+INSERT_CHUNK = 5000
+
+
+async def _merge_seen_sets(session: AsyncSession, batch: Dict[int, Set[int]]) -> None:
+    """Дописать пачку просмотренных к viewed_sets одним upsert'ом."""
+    existing = await session.execute(
+        select(ViewedSet.viewer_id, ViewedSet.data).where(ViewedSet.viewer_id.in_(batch))
+    )
+    for viewer_id, data in existing:
+        batch[viewer_id].update(decode_ids(data))
+
+    now = datetime.utcnow()
+    upsert = insert(ViewedSet).values([
+        {"viewer_id": viewer_id, "data": encode_ids(seen), "updated_at": now}
+        for viewer_id, seen in batch.items()
+    ])
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[ViewedSet.viewer_id],
+        set_={"data": upsert.excluded.data, "updated_at": upsert.excluded.updated_at}
+    )
+    await session.execute(upsert)
+    await session.commit()
+
+
+async def seen_sets_import(args: argparse.Namespace) -> None:
+    """Перенести строки viewed_profiles в компактные viewed_sets.
+
+    Строки читаются потоком, по зрителю за раз, а пишутся пачками по
+    BATCH_SIZE зрителей в отдельной сессии: курсор чтения живёт в своей
+    транзакции и не закрывается коммитами.
+    """
+    print("📦 Конвертация viewed_profiles → viewed_sets...")
+    converted = 0
+    async with async_session_maker() as reader, async_session_maker() as writer:
+        stmt = (
+            select(ViewedProfile.viewer_id, func.array_agg(ViewedProfile.viewed_id))
+            .group_by(ViewedProfile.viewer_id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        batch: Dict[int, Set[int]] = {}
+        async for viewer_id, viewed_ids in await reader.stream(stmt):
+            batch[viewer_id] = set(viewed_ids)
+            if len(batch) == BATCH_SIZE:
+                await _merge_seen_sets(writer, batch)
+                converted += len(batch)
+                batch = {}
+                print(f"   ... {converted} зрителей")
+        if batch:
+            await _merge_seen_sets(writer, batch)
+            converted += len(batch)
+
+        if args.purge:
+            await writer.execute(delete(ViewedProfile))
+            await writer.commit()
+
+    print(f"✅ Сконвертировано зрителей: {converted}")
+    if args.purge:
+        print("🗑 Строки viewed_profiles удалены")
+
+
+async def seen_sets_export(args: argparse.Namespace) -> None:
+    """Развернуть viewed_sets обратно в строки viewed_profiles."""
+    print("📦 Конвертация viewed_sets → viewed_profiles...")
+    converted = 0
+    async with async_session_maker() as session:
+        rows = (await session.execute(select(ViewedSet.viewer_id, ViewedSet.data))).all()
+
+        for viewer_id, data in rows:
+            # Пары, которые уже есть строками (повторный запуск, двойная
+            # запись), не дублируем: уникальна только тройка с created_at
+            existing = set((await session.execute(
+                select(ViewedProfile.viewed_id).where(ViewedProfile.viewer_id == viewer_id)
+            )).scalars())
+            now = datetime.utcnow()
+            values = [
+                {"viewer_id": viewer_id, "viewed_id": viewed_id, "created_at": now}
+                for viewed_id in decode_ids(data)
+                if viewed_id not in existing
+            ]
+            for start in range(0, len(values), INSERT_CHUNK):
+                await session.execute(
+                    insert(ViewedProfile)
+                    .values(values[start:start + INSERT_CHUNK])
+                    .on_conflict_do_nothing(
+                        index_elements=["viewer_id", "viewed_id", "created_at"]
+                    )
+                )
+            converted += 1
+            if converted % BATCH_SIZE == 0:
+                await session.commit()
+                print(f"   ... {converted} зрителей")
+
+        if args.purge:
+            await session.execute(delete(ViewedSet))
+        await session.commit()
+
+    print(f"✅ Сконвертировано зрителей: {converted}")
+    if args.purge:
+        print("🗑 Строки viewed_sets удалены")
+
+
+async def viewed_partitions(args: argparse.Namespace) -> None:
+    """Создать будущие партиции viewed_profiles и убрать устаревшие."""
+    print("🗂 Обслуживание партиций viewed_profiles...")
+    try:
+        Config.validate_retention()
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    async with async_session_maker() as session:
+        if not await is_partitioned(session):
+            print("❌ viewed_profiles не партиционирована — примените миграции")
+            sys.exit(1)
+        created = await ensure_partitions(session, Config.VIEWED_PARTITIONS_AHEAD)
+        expired = await expire_partitions(
+            session,
+            Config.VIEWED_RETENTION_DAYS,
+            drop=args.drop
+        )
+        await session.commit()
+
+    for name in created:
+        print(f"   + {name}")
+    for name in expired:
+        print(f"   - {name}")
+    action = "удалено" if args.drop else "отсоединено"
+    print(f"✅ Создано партиций: {len(created)}, {action}: {len(expired)}")
+
+
+async def likes_counters(args: argparse.Namespace) -> None:
+    """Пересчитать users.incoming_likes_count по таблице likes."""
+    print("🔢 Сверка счётчиков входящих лайков...")
+    async with async_session_maker() as session:
+        fixed = await LikeRepository.reconcile_incoming_counts(session)
+        await session.commit()
+    print(f"✅ Исправлено счётчиков: {fixed}")
+
+
+COMMANDS = {
+    "seen-sets-import": seen_sets_import,
+    "seen-sets-export": seen_sets_export,
+    "viewed-partitions": viewed_partitions,
+    "likes-counters": likes_counters,
+}
+
+
+async def main() -> None:
+    """Главная функция."""
+    parser = argparse.ArgumentParser(description="Обслуживание базы данных")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument(
+        "--purge",
+        action="store_true",
+        help="удалить исходные данные после конвертации"
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="удалять устаревшие партиции, а не только отсоединять"
+    )
+    args = parser.parse_args()
+
+    await COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\n👋 Прервано пользователем")
+        sys.exit(1)